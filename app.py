@@ -1,13 +1,29 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request
 from flask_assets import Environment, Bundle
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, READ_ACCESS
 from dotenv import load_dotenv
 import os
+import asyncio
+import atexit
+import threading
+import concurrent.futures
 from functools import wraps
 
 load_dotenv()
 
-app = Flask(__name__)
+SNAPSHOT_DIR = "snapshots"  # under static/, written by export_snapshots.py
+SNAPSHOT_MAX_AGE = 365 * 24 * 3600
+
+
+class NewsApp(Flask):
+    def get_send_file_max_age(self, filename):
+        # Snapshot files are content-hashed, only the manifest can change under the same name
+        if filename and filename.startswith(f"{SNAPSHOT_DIR}/") and not filename.endswith("manifest.json"):
+            return SNAPSHOT_MAX_AGE
+        return super().get_send_file_max_age(filename)
+
+
+app = NewsApp(__name__)
 
 assets = Environment(app)
 assets.url = app.static_url_path
@@ -35,24 +51,79 @@ class Config:
     NEO4J_URI = os.getenv("NEO4J_URI")
     NEO4J_USER = os.getenv("NEO4J_USER")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+    NEO4J_DATABASE = os.getenv("NEO4J_DATABASE")  # None = server default
     NEO4J_MAX_CONNECTION_LIFETIME = 3600  # 1 hour
+    NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", 16))  # per worker process
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", 5))  # seconds
+    NEO4J_QUERY_TIMEOUT = float(os.getenv("NEO4J_QUERY_TIMEOUT", 30))  # seconds
+    GRAPH_NODE_LIMIT = int(os.getenv("GRAPH_NODE_LIMIT", 50))  # default top-K entities per article graph
+    GRAPH_NODE_LIMIT_MAX = 500
 
 app.config.from_object(Config)
 
 # Neo4j connection pool
-driver = GraphDatabase.driver(
-    app.config["NEO4J_URI"],
-    auth=(app.config["NEO4J_USER"], app.config["NEO4J_PASSWORD"]),
-    max_connection_lifetime=app.config["NEO4J_MAX_CONNECTION_LIFETIME"]
-)
+# The async driver lives on a single background event loop per worker process.
+# Request threads hand their queries to that loop, so all of them share one
+# connection pool instead of each holding a socket for the whole round-trip.
+# Both are created lazily so forked server workers get their own loop/driver.
+_loop = None
+_loop_pid = None
+_driver = None
+_loop_lock = threading.Lock()
+
+
+def create_driver():
+    return AsyncGraphDatabase.driver(
+        app.config["NEO4J_URI"],
+        auth=(app.config["NEO4J_USER"], app.config["NEO4J_PASSWORD"]),
+        max_connection_lifetime=app.config["NEO4J_MAX_CONNECTION_LIFETIME"],
+        max_connection_pool_size=app.config["NEO4J_MAX_CONNECTION_POOL_SIZE"],
+        connection_acquisition_timeout=app.config["NEO4J_CONNECTION_ACQUISITION_TIMEOUT"]
+    )
+
+
+def get_loop():
+    global _loop, _loop_pid, _driver
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            _driver = None
+            threading.Thread(target=_loop.run_forever, name="neo4j-loop", daemon=True).start()
+    return _loop
+
+
+async def _collect_records(tx, query, params):
+    result = await tx.run(query, params)
+    return [record async for record in result]
+
+
+async def _read(query, params):
+    global _driver
+    if _driver is None:
+        _driver = create_driver()
+
+    # READ_ACCESS lets a neo4j:// (routing) URI send these to read replicas/followers
+    async with _driver.session(database=app.config["NEO4J_DATABASE"],
+                               default_access_mode=READ_ACCESS) as session:
+        return await session.execute_read(_collect_records, query, params)
+
+
+def read_query(query, **params):
+    """Run a read transaction on the shared async driver and return its records."""
+    future = asyncio.run_coroutine_threadsafe(_read(query, params), get_loop())
+    try:
+        return future.result(timeout=app.config["NEO4J_QUERY_TIMEOUT"])
+    except concurrent.futures.TimeoutError:
+        # Otherwise the query keeps running on the loop and holds its pooled connection
+        future.cancel()
+        raise
+
 
-# Constants
-ENTITY_LABELS = [
-    "Osoba", "Organizacija", "Lokacija", "Vreme", "Aktivnost",
-    "AktivnostDogađaj", "Događaj", "Grupa", "Vozilo", "Proizvod",
-    "Umetničko delo", "Dokument", "Biljka", "Broj", "Hrana", "Piće",
-    "Institucija", "Simbol", "HranaPiće", "Životinja", "Tehnologija", "Entity"
-]
+@atexit.register
+def close_driver():
+    if _driver is not None and _loop is not None and _loop_pid == os.getpid():
+        asyncio.run_coroutine_threadsafe(_driver.close(), _loop).result(timeout=5)
 
 # Decorators
 def handle_neo4j_exceptions(f):
@@ -65,62 +136,145 @@ def handle_neo4j_exceptions(f):
             return jsonify({"error": "Database error occurred"}), 500
     return decorated_function
 
+# Queries
+# Query to get all articles grouped by bias and then by source
+INDEX_QUERY = """
+    MATCH (a:Article)
+    WITH a.bias AS bias, a.source AS source, collect(a) AS articles
+    RETURN bias, source, articles
+    ORDER BY bias, source
+"""
+
+# Top $limit entities of the article by importance (see populate_graph.compute_entity_importance),
+# plus the relations from this article between them. Candidates are the mentioned entities and
+# the other endpoints of this article's relations, which the article need not mention itself
+GRAPH_QUERY = """
+    MATCH (a:Article)-->(mentioned)
+    WHERE elementId(a) = $article_id
+    OPTIONAL MATCH (mentioned)-[rel]-(related)
+    WHERE rel.article = a.title
+    WITH a, collect(DISTINCT mentioned) + collect(DISTINCT related) AS candidates
+    UNWIND candidates AS candidate
+    WITH DISTINCT a, candidate
+    ORDER BY coalesce(candidate.importance, 0) DESC
+    LIMIT $limit
+    WITH a, collect(candidate) AS kept
+    UNWIND kept AS connected
+    OPTIONAL MATCH (a)-[r]->(connected)
+    WITH a, kept, r, connected
+    OPTIONAL MATCH (connected)-[r2]->(other_connected)
+    WHERE r2.article = a.title AND other_connected IN kept
+    RETURN r, connected, r2, other_connected
+"""
+
+ARTICLE_QUERY = """
+    MATCH (a:Article)
+    WHERE elementId(a) = $article_id OR elementId(a) = toInteger($article_id)
+    RETURN a
+"""
+
+def build_graph(result):
+    """Turn GRAPH_QUERY records into the {"nodes": [...], "edges": [...]} payload."""
+    nodes = []
+    edges = []
+    node_ids = set()
+
+    for record in result:
+        # Skip adding the article node (a) to the graph nodes
+        connected = record["connected"]
+        if connected and connected.element_id not in node_ids:
+            node_type = next(iter(connected.labels), "Entity").lower()
+            nodes.append({
+                "id": connected.element_id,
+                "label": connected.get("name", connected.get("title", f"{node_type} {connected.element_id}")),
+                "group": node_type,
+                "importance": connected.get("importance", 0),
+                "properties": dict(connected)
+            })
+            node_ids.add(connected.element_id)
+
+        # Add edges only for connected nodes, excluding the article node
+        rel = record["r"]
+        if rel is not None and connected:
+            edges.append({
+                "from": connected.element_id,  # Start node of the edge
+                "to": record["connected"].element_id,  # End node of the edge
+                "label": rel.type,
+                "properties": dict(rel)
+            })
+
+        # Additional logic for edges between connected nodes
+        connected2 = record["other_connected"]
+        if connected2 and connected2.element_id not in node_ids:
+            nodes.append({
+                "id": connected2.element_id,
+                "label": connected2.get("name", connected2.get("title", f"{connected2.element_id}")),
+                "group": next(iter(connected2.labels), "Entity").lower(),
+                "importance": connected2.get("importance", 0),
+                "properties": dict(connected2)
+            })
+            node_ids.add(connected2.element_id)
+
+        if record["r2"]:
+            edges.append({
+                "from": connected.element_id,
+                "to": connected2.element_id,
+                "label": record["r2"].type,
+                "properties": dict(record["r2"])
+            })
+
+    return {"nodes": nodes, "edges": edges}
+
+
 # Routes
 @app.route("/")
 def index():
     try:
-        with driver.session() as session:
-            # Query to get all articles grouped by bias and then by source
-            result = session.run("""
-                MATCH (a:Article)
-                WITH a.bias AS bias, a.source AS source, collect(a) AS articles
-                RETURN bias, source, articles
-                ORDER BY bias, source
-            """)
-
-            # Create a nested dictionary structure: {bias: {source: [articles]}}
-            bias_groups = {}
-
-            for record in result:
-                bias = record["bias"] or "Nepoznat bias"
-                source = record["source"] or "Nepoznat izvor"
-                articles = []
-
-                for article in record["articles"]:
-                    articles.append({
-                        "id": article.element_id,
-                        "title": article.get("title", f"Article {article.element_id}"),
-                        "source": source,
-                        "bias": bias,
-                        "url": article.get("url", "#"),
-                        "content": article.get("content", "<p>Sadržaj članka nije dostupan.</p>"),
-                        "date": article.get("date", ""),
-                        "read_time": article.get("read_time", "")
-                    })
-
-                if bias not in bias_groups:
-                    bias_groups[bias] = {}
-
-                bias_groups[bias][source] = articles
-
-            # Convert the nested dictionary to a template-friendly structure
-            groups = []
-            for bias, sources in bias_groups.items():
-                source_list = []
-                for source_name, articles in sources.items():
-                    source_list.append({
-                        "id": source_name.lower().replace(" ", "-"),
-                        "name": source_name,
-                        "articles": articles
-                    })
-
-                groups.append({
-                    "id": bias.lower().replace(" ", "-"),
-                    "name": bias,
-                    "sources": source_list
+        result = read_query(INDEX_QUERY)
+
+        # Create a nested dictionary structure: {bias: {source: [articles]}}
+        bias_groups = {}
+
+        for record in result:
+            bias = record["bias"] or "Nepoznat bias"
+            source = record["source"] or "Nepoznat izvor"
+            articles = []
+
+            for article in record["articles"]:
+                articles.append({
+                    "id": article.element_id,
+                    "title": article.get("title", f"Article {article.element_id}"),
+                    "source": source,
+                    "bias": bias,
+                    "url": article.get("url", "#"),
+                    "content": article.get("content", "<p>Sadržaj članka nije dostupan.</p>"),
+                    "date": article.get("date", ""),
+                    "read_time": article.get("read_time", "")
+                })
+
+            if bias not in bias_groups:
+                bias_groups[bias] = {}
+
+            bias_groups[bias][source] = articles
+
+        # Convert the nested dictionary to a template-friendly structure
+        groups = []
+        for bias, sources in bias_groups.items():
+            source_list = []
+            for source_name, articles in sources.items():
+                source_list.append({
+                    "id": source_name.lower().replace(" ", "-"),
+                    "name": source_name,
+                    "articles": articles
                 })
 
-            return render_template("index.html", groups=groups)
+            groups.append({
+                "id": bias.lower().replace(" ", "-"),
+                "name": bias,
+                "sources": source_list
+            })
+
+        return render_template("index.html", groups=groups)
 
     except Exception as e:
         app.logger.error(f"Error in index route: {str(e)}")
@@ -133,67 +287,10 @@ def get_article_graph(article_id):
     if not article_id or not isinstance(article_id, str):
         return jsonify({"error": "Invalid article ID"}), 400
 
-    with driver.session() as session:
-        query = """
-        MATCH (a:Article)-[r]->(connected)
-        WHERE elementId(a) = $article_id
-        OPTIONAL MATCH (connected)-[r2]->(other_connected)
-        WHERE r2.article = a.title
-        RETURN r, connected, r2, other_connected
-        """
-        result = session.run(query, article_id=article_id)
-
-        nodes = []
-        edges = []
-        node_ids = set()
-
-        print(f"Query executed for article_id: {article_id}")  # Add debug log
-
-        for record in result:
-            # Skip adding the article node (a) to the graph nodes
-            connected = record["connected"]
-            if connected and connected.element_id not in node_ids:
-                node_type = next(iter(connected.labels), "Entity").lower()
-                nodes.append({
-                    "id": connected.element_id,
-                    "label": connected.get("name", connected.get("title", f"{node_type} {connected.element_id}")),
-                    "group": node_type,
-                    "properties": dict(connected)
-                })
-                node_ids.add(connected.element_id)
-
-            # Add edges only for connected nodes, excluding the article node
-            rel = record["r"]
-            if rel.type and connected:
-                edges.append({
-                    "from": connected.element_id,  # Start node of the edge
-                    "to": record["connected"].element_id,  # End node of the edge
-                    "label": rel.type,
-                    "properties": dict(rel)
-                })
-
-            # Additional logic for edges between connected nodes
-            connected2 = record["other_connected"]
-            if connected2 and connected2.element_id not in node_ids:
-                nodes.append({
-                    "id": connected2.element_id,
-                    "label": connected2.get("name", connected2.get("title", f"{connected2.element_id}")),
-                    "group": next(iter(connected2.labels), "Entity").lower(),
-                    "properties": dict(connected2)
-                })
-                node_ids.add(connected2.element_id)
-
-            if record["r2"]:
-                edges.append({
-                    "from": connected.element_id,
-                    "to": connected2.element_id,
-                    "label": record["r2"].type,
-                    "properties": dict(record["r2"])
-                })
+    limit = request.args.get("limit", app.config["GRAPH_NODE_LIMIT"], type=int)
+    limit = max(1, min(limit, app.config["GRAPH_NODE_LIMIT_MAX"]))
 
-        # for rel in edges:
-        #     print(rel["from"], rel["to"], rel["label"], rel["properties"])
-        return jsonify({"nodes": nodes, "edges": edges})
+    return jsonify(build_graph(read_query(GRAPH_QUERY, article_id=article_id, limit=limit)))
 
 
 @app.route("/api/article/<article_id>")
@@ -202,30 +299,23 @@ def get_article_content(article_id):
     if not article_id or not isinstance(article_id, str):
         return jsonify({"error": "Invalid article ID"}), 400
 
-    with driver.session() as session:
-        query = """
-        MATCH (a:Article)
-        WHERE elementId(a) = $article_id OR elementId(a) = toInteger($article_id)
-        RETURN a
-        """
-        result = session.run(query, article_id=article_id).single()
-
-        if not result:
-            return jsonify({"error": "Article not found"}), 404
-
-        article = result["a"]
-        return jsonify({
-            "id": article.element_id,
-            "title": article.get("title", f"Article {article.element_id}"),
-            "date": article.get("date", ""),
-            "readTime": article.get("read_time", ""),
-            "content": article.get("text", "Sadržaj članka nije dostupan."),
-            "source": article.get("source", ""),
-            "bias": article.get("bias", "#"),
-            "url": article.get("url", "#"),
-            "factCheck": article.get("fact_check", "Nema dostupne informacije o proveri činjenica."),
-            "tone": article.get("tone", "Nema dostupne analize tona.")
-        })
+    records = read_query(ARTICLE_QUERY, article_id=article_id)
+    if not records:
+        return jsonify({"error": "Article not found"}), 404
+
+    article = records[0]["a"]
+    return jsonify({
+        "id": article.element_id,
+        "title": article.get("title", f"Article {article.element_id}"),
+        "date": article.get("date", ""),
+        "readTime": article.get("read_time", ""),
+        "content": article.get("text", "Sadržaj članka nije dostupan."),
+        "source": article.get("source", ""),
+        "bias": article.get("bias", "#"),
+        "url": article.get("url", "#"),
+        "factCheck": article.get("fact_check", "Nema dostupne informacije o proveri činjenica."),
+        "tone": article.get("tone", "Nema dostupne analize tona.")
+    })
 
 # Error handlers
 @app.errorhandler(404)
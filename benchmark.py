@@ -0,0 +1,424 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import threading
+import multiprocessing
+
+import aiohttp
+from colorama import Fore, init
+
+from fake_neo4j import GraphStore, FakeDriver, FakeAsyncDriver
+
+init(autoreset=True)
+
+SOURCES = [
+    ("Informer", "pro_vucic"),
+    ("Pink", "pro_vucic"),
+    ("Nova RS", "opposition"),
+    ("N1", "opposition"),
+]
+
+LABELS = ["Osoba", "Organizacija", "Lokacija", "Institucija", "Događaj", "Vreme", "Dokument", "Grupa"]
+
+# Deliberately includes inflected variants of the same relation, like real LLM output
+RELATION_PHRASES = [
+    "izjavio", "je izjavio", "izjavljuje", "kritikovao", "je kritikovao", "podržao", "podržava",
+    "sastao se sa", "se sastao sa", "optužio", "je optužio", "najavio", "posetio", "učestvuje u",
+    "član", "je član", "predsednik", "vodi", "potpisao", "razgovarao sa",
+]
+
+# Route mix used by the load generator, as relative weights
+ROUTE_WEIGHTS = {"index": 1, "graph": 10, "article": 10}
+
+
+# ===== Synthetic corpus =====
+def generate_corpus(articles, entities_per_article=12.0, relations_per_article=8.0,
+                    vocabulary=None, hubs=20, hub_share=0.15, seed=42):
+    """Build articles shaped like data/entities_and_relations.json.
+
+    Entity and relation counts per article are lognormal around the given means.
+    A fixed set of hub entities (think: the president, the government) is mentioned
+    with probability hub_share per slot; the rest follow a Zipf-like long tail.
+    """
+    rng = random.Random(seed)
+    vocabulary = vocabulary or max(hubs + 1, int(articles * entities_per_article / 5))
+    names = [f"Entitet {i}" for i in range(vocabulary)]
+    labels = [rng.choice(LABELS) for _ in range(vocabulary)]
+    tail_weights = [1.0 / (rank + 1) for rank in range(vocabulary - hubs)]
+    tail_cumulative = []
+    total = 0.0
+    for weight in tail_weights:
+        total += weight
+        tail_cumulative.append(total)
+
+    def count(mean):
+        return max(1, int(rng.lognormvariate(0, 0.6) * mean))
+
+    def pick_entity():
+        if rng.random() < hub_share:
+            return rng.randrange(hubs)
+        return hubs + rng.choices(range(len(tail_weights)), cum_weights=tail_cumulative)[0]
+
+    corpus = []
+    for i in range(articles):
+        source, bias = SOURCES[i % len(SOURCES)]
+        chosen = list(dict.fromkeys(pick_entity() for _ in range(count(entities_per_article))))
+        entities = ", ".join(f"{names[e]}:{labels[e]}" for e in chosen)
+
+        relations = []
+        if len(chosen) > 1:
+            for _ in range(count(relations_per_article)):
+                a, b = rng.sample(chosen, 2)
+                relations.append(f"{names[a]} -[:{rng.choice(RELATION_PHRASES)}]-> {names[b]}")
+        relations = ", ".join(relations)
+
+        title = f"Sintetički članak {i}"
+        corpus.append({
+            "article_source": source,
+            "article_bias": bias,
+            "article_title": title,
+            "article_url": f"https://example.invalid/vesti/{i}",
+            "article_text": " ".join(["Lorem ipsum dolor sit amet."] * rng.randint(20, 120)),
+            "entities": entities,
+            "entity_count": len(chosen),
+            "relations": relations,
+            "relations_count": len(relations.split(", ")) if relations else 0,
+            "fact_check": "",
+            "tone_analysis": "neutralan"
+        })
+    return corpus
+
+
+def load_corpus(corpus, driver, workers=1):
+    from populate_graph import ArticleGraph, URI, USER, PASSWORD
+
+    graph = ArticleGraph(URI, USER, PASSWORD, driver=driver)
+    start = time.perf_counter()
+    graph.create_indexes()
+    graph.process_all_articles(corpus, workers)
+    graph.compute_entity_importance()
+    elapsed = time.perf_counter() - start
+    graph.close()
+    print(Fore.CYAN + f"📥 Loaded {len(corpus)} articles in {elapsed:.2f}s ({len(corpus) / elapsed:.1f} articles/s)")
+
+
+# ===== Server =====
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def _serve_gunicorn(port, workers, threads):
+    import app as app_module
+    from serve import run_server
+    run_server(app_module.app, "127.0.0.1", port, workers, threads, preload=True, access_log=False)
+
+
+def start_server(store, latency, workers, threads):
+    """Start app.py on a free port, returning (base url, stop function).
+
+    With a fake store the graph has to be inherited by the server, so gunicorn is
+    forked from this process for every worker count, one included; Windows has no
+    fork, there a threaded werkzeug server is used.
+    """
+    import app as app_module
+
+    if store is not None:
+        app_module.create_driver = lambda: FakeAsyncDriver(store, latency)
+
+    port = free_port()
+    if sys.platform != "win32":
+        proc = multiprocessing.get_context("fork").Process(target=_serve_gunicorn, args=(port, workers, threads))
+        proc.start()
+        wait_for_port(port)
+
+        def stop():
+            proc.terminate()
+            proc.join(10)
+    else:
+        from werkzeug.serving import make_server
+        server = make_server("127.0.0.1", port, app_module.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        wait_for_port(port)
+        stop = server.shutdown
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+# ===== Load generator =====
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def fetch_article_ids(session, base_url):
+    async with session.get(f"{base_url}/") as response:
+        html = await response.text()
+    return re.findall(r'data-article-id="([^"]+)"', html)
+
+
+async def drive(base_url, article_ids, clients, duration, seed=0):
+    rng = random.Random(seed)
+    routes = list(ROUTE_WEIGHTS)
+    weights = list(ROUTE_WEIGHTS.values())
+    latencies = {route: [] for route in routes}
+    errors = {route: 0 for route in routes}
+    deadline = time.perf_counter() + duration
+
+    def url_for(route):
+        if route == "index":
+            return f"{base_url}/"
+        return f"{base_url}/api/{route}/{rng.choice(article_ids)}"
+
+    async def client(session):
+        while time.perf_counter() < deadline:
+            route = rng.choices(routes, weights)[0]
+            start = time.perf_counter()
+            try:
+                async with session.get(url_for(route)) as response:
+                    await response.read()
+                    ok = response.status == 200
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                latencies[route].append(time.perf_counter() - start)
+            else:
+                errors[route] += 1
+
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, errors, elapsed
+
+
+def report(label, latencies, errors, elapsed):
+    total = sum(len(values) for values in latencies.values())
+    print(Fore.YELLOW + f"\n=== {label}: {total / elapsed:.1f} req/s over {elapsed:.1f}s ===")
+    print(f"{'route':<10}{'ok':>8}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, values in latencies.items():
+        values.sort()
+        print(f"{route:<10}{len(values):>8}{errors[route]:>8}{len(values) / elapsed:>10.1f}"
+              f"{percentile(values, 50) * 1000:>10.1f}{percentile(values, 95) * 1000:>10.1f}"
+              f"{percentile(values, 99) * 1000:>10.1f}")
+    return total / elapsed
+
+
+async def run_load(base_url, clients, duration):
+    async with aiohttp.ClientSession() as session:
+        article_ids = await fetch_article_ids(session, base_url)
+    if not article_ids:
+        raise RuntimeError(f"No articles listed at {base_url}/")
+    return await drive(base_url, article_ids, clients, duration)
+
+
+# ===== Memory benchmark (scraper and NLP stages, no network or LLM) =====
+
+MEMORY_SOURCE = {"url": "https://nova.rs/vesti/politika/", "name": "Nova RS", "bias": "opposition"}
+MEMORY_LLM_LATENCY = 0.5  # seconds per fake LLM request, so requests overlap like the real API
+WORDS = ["Vlada", "Srbije", "predsednik", "skupština", "opozicija", "izbori", "ministar", "Beograd",
+         "je", "izjavio", "da", "će", "u", "narednom", "periodu", "zakon", "protest", "građani", "odluka"]
+
+
+def fixture_listing(articles):
+    items = "".join(f'<div class="uc-post-title"><a href="/vesti/politika/clanak-{i}/">Naslov vesti {i}</a></div>'
+                    for i in range(articles))
+    return f"<html><body><main>{items}</main></body></html>"
+
+
+def fixture_article(url):
+    # Roughly the shape of a real article page: scripts, navigation and a sidebar around the text
+    rng = random.Random(url)
+    paragraphs = "".join(f"<p>{' '.join(rng.choices(WORDS, k=rng.randint(40, 90)))}.</p>"
+                         for _ in range(rng.randint(6, 14)))
+    nav = "".join(f'<li><a href="/rubrika/{i}/">Rubrika {i}</a></li>' for i in range(150))
+    sidebar = "".join(f'<div class="related"><a href="/vesti/{i}/"><img src="/img/{i}.jpg" alt="">'
+                      f'<span>Povezana vest {i}</span></a></div>' for i in range(60))
+    return (f"<html><head><script>{'var x = 1;' * 800}</script><style>{'.a{color:red}' * 400}</style></head>"
+            f"<body><nav><ul>{nav}</ul></nav><div class=\"post\"><h1>{url}</h1>{paragraphs}</div>"
+            f"<aside>{sidebar}</aside><footer>{'<p>Impresum</p>' * 20}</footer></body></html>")
+
+
+def fixture_completion(prompt):
+    # Same format as the real model: one section per article for batched prompts
+    rng = random.Random(prompt[-200:])
+    count = prompt.count("### KRAJ ČLANKA") or 1
+    sections = []
+    for number in range(1, count + 1):
+        entities = ", ".join(f"{rng.choice(WORDS)} {i}:{rng.choice(LABELS)}" for i in range(12))
+        relations = ", ".join(f"{rng.choice(WORDS)} {i} -[:{rng.choice(RELATION_PHRASES)}]-> {rng.choice(WORDS)}"
+                              for i in range(8))
+        claims = "\n\n".join(f'- Tvrdnja {i}: "{" ".join(rng.choices(WORDS, k=25))}"\n  Ocena: verovatno tačno\n'
+                              f"  Kontekst: {' '.join(rng.choices(WORDS, k=40))}" for i in range(1, 5))
+        body = (f"Entiteti: [{entities}]\nRelacije: [{relations}]\nFactCheck: \n{claims}\n\n"
+                f"Ton: {' '.join(rng.choices(WORDS, k=30))}")
+        sections.append(f"### ČLANAK {number} ###\n{body}" if count > 1 else body)
+    return "\n\n".join(sections)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _memory_stage(stage, articles, path, results):
+    # Runs in a fresh process so every stage gets its own peak RSS
+    os.environ.setdefault("OPENROUTER_API_KEY", "memory-benchmark")
+    import nlp
+    import news_scraper
+    from dataclasses import asdict, is_dataclass
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if stage == "scrape":
+        listing = fixture_listing(articles)
+
+        async def fetch_page(session, url):
+            return listing if url == MEMORY_SOURCE["url"] else fixture_article(url)
+
+        news_scraper.fetch_page = fetch_page
+        news_scraper.FEEDS = {}
+        scraped = asyncio.run(news_scraper.scrape_site(None, MEMORY_SOURCE, 0))
+        count = len(scraped)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([asdict(a) if is_dataclass(a) else a for a in scraped], f, ensure_ascii=False)
+    else:
+        async def complete(prompt):
+            await asyncio.sleep(MEMORY_LLM_LATENCY)
+            return fixture_completion(prompt)
+
+        nlp.complete = complete
+        nlp.DATA_PATH, nlp.OUTPUT_PATH = path, path + ".nlp.json"
+        asyncio.run(nlp.process_articles())
+        count = sum(1 for line in open(nlp.OUTPUT_PATH, encoding="utf-8") if '"article_url"' in line)
+    results.put((stage, count, time.perf_counter() - started, baseline, peak_rss_mb()))
+
+
+def run_memory(articles):
+    import tempfile
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "articles.json")
+        rows = []
+        for stage in ("scrape", "nlp"):
+            process = context.Process(target=_memory_stage, args=(stage, articles, path, results))
+            process.start()
+            rows.append(results.get())
+            process.join()
+
+    print(Fore.YELLOW + f"\n=== Memory, {articles} fixture articles ===")
+    print(f"{'stage':<8}{'articles':>10}{'time':>10}{'RSS after imports':>20}{'peak RSS':>12}")
+    for stage, count, elapsed, baseline, peak in rows:
+        if peak is None:
+            print(f"{stage:<8}{count:>10}{elapsed:>9.1f}s{'n/a':>20}{'n/a':>12}")
+        else:
+            print(f"{stage:<8}{count:>10}{elapsed:>9.1f}s{baseline:>17.1f} MB{peak:>9.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Flask API on a synthetic news graph")
+    parser.add_argument("--articles", type=int, default=10_000)
+    parser.add_argument("--entities-per-article", type=float, default=12.0)
+    parser.add_argument("--relations-per-article", type=float, default=8.0)
+    parser.add_argument("--vocabulary", type=int, default=None, help="distinct entities (default: articles * entities / 5)")
+    parser.add_argument("--hubs", type=int, default=20)
+    parser.add_argument("--hub-share", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--write-corpus", metavar="PATH", help="also save the corpus as JSON")
+    parser.add_argument("--backend", choices=["fake", "neo4j"], default="fake",
+                        help="fake: in-memory driver; neo4j: the server in .env (e.g. a local, Dockerless install)")
+    parser.add_argument("--skip-load", action="store_true", help="neo4j backend: reuse the data already in the database")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="simulated round-trip per query (fake backend)")
+    parser.add_argument("--ingest-workers", type=int, default=1, help="writer sessions for the initial load")
+    parser.add_argument("--ingest-latency-ms", type=float, default=0.0,
+                        help="simulated round-trip per query during the initial load (fake backend)")
+    parser.add_argument("--transient-error-rate", type=float, default=0.0,
+                        help="share of write transactions that fail with a deadlock during the load (fake backend)")
+    parser.add_argument("--driver-retries", type=int, default=3,
+                        help="times the fake driver reruns a failed write transaction before raising (fake backend)")
+    parser.add_argument("--url", help="drive an already running server instead of starting one")
+    parser.add_argument("--workers", default="1", help="comma-separated worker counts to compare, e.g. 1,2,4")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per run")
+    parser.add_argument("--memory", action="store_true",
+                        help="instead of the load test, measure peak RSS of the scraper and NLP stages "
+                             "over --articles fixture pages")
+    args = parser.parse_args()
+
+    if args.memory:
+        run_memory(args.articles)
+        return
+
+    if args.url:
+        latencies, errors, elapsed = asyncio.run(run_load(args.url.rstrip("/"), args.clients, args.duration))
+        report(args.url, latencies, errors, elapsed)
+        return
+
+    store = None
+    if not (args.backend == "neo4j" and args.skip_load):
+        print(Fore.CYAN + f"🧪 Generating {args.articles} synthetic articles...")
+        corpus = generate_corpus(args.articles, args.entities_per_article, args.relations_per_article,
+                                 args.vocabulary, args.hubs, args.hub_share, args.seed)
+        if args.write_corpus:
+            os.makedirs(os.path.dirname(args.write_corpus) or ".", exist_ok=True)
+            with open(args.write_corpus, "w", encoding="utf-8") as f:
+                json.dump(corpus, f, ensure_ascii=False)
+
+        if args.backend == "fake":
+            store = GraphStore()
+            driver = FakeDriver(store, args.ingest_latency_ms / 1000, args.transient_error_rate, args.driver_retries)
+            load_corpus(corpus, driver, args.ingest_workers)
+            print(Fore.CYAN + f"   {len(store.nodes)} nodes, {store.relationship_count} relationships, "
+                              f"{store.lock_waits} lock waits, {store.deadlocks} deadlocks")
+        else:
+            load_corpus(corpus, None, args.ingest_workers)
+        del corpus
+
+    results = {}
+    for workers in [int(w) for w in args.workers.split(",")]:
+        base_url, stop = start_server(store, args.latency_ms / 1000, workers, args.threads)
+        try:
+            latencies, errors, elapsed = asyncio.run(run_load(base_url, args.clients, args.duration))
+        finally:
+            stop()
+        results[workers] = report(f"{workers} worker(s) x {args.threads} threads", latencies, errors, elapsed)
+
+    if len(results) > 1:
+        baseline = next(iter(results.values()))
+        print(Fore.YELLOW + "\n=== Scaling ===")
+        for workers, throughput in results.items():
+            print(f"{workers:>3} worker(s): {throughput:>8.1f} req/s  ({throughput / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Continuous ingestion, as an alternative to the one-shot run_all.py rebuild.
+
+Every source is polled on its own interval, which shrinks while the source keeps
+publishing and grows while it is quiet. Only URLs not seen before go through
+scrape -> NLP -> graph. Front-page articles are handled before backfill, newest
+first. The NLP stage is rate limited and the graph stage is a single writer, so
+load on the LLM API and on Neo4j stays steady.
+
+State (seen URLs, per-source intervals, articles still waiting) is kept in
+data/daemon_state.json. Ctrl+C / SIGTERM stops discovery and scraping, lets the
+NLP and graph stages drain what is already scraped, and saves the rest for the
+next start.
+"""
+import os
+import json
+import time
+import heapq
+import signal
+import asyncio
+import argparse
+import itertools
+from datetime import datetime
+from dataclasses import asdict
+
+import aiohttp
+from dotenv import load_dotenv
+from colorama import Fore, init
+
+import nlp
+import news_scraper
+from populate_graph import ArticleGraph, URI, USER, PASSWORD
+from export_snapshots import export_snapshots
+
+load_dotenv()
+init(autoreset=True)
+
+STATE_PATH = "data/daemon_state.json"
+
+POLL_INTERVAL = float(os.getenv("DAEMON_POLL_INTERVAL", 300))  # seconds, starting interval per source
+MIN_POLL_INTERVAL = float(os.getenv("DAEMON_MIN_POLL_INTERVAL", 60))
+MAX_POLL_INTERVAL = float(os.getenv("DAEMON_MAX_POLL_INTERVAL", 1800))
+POLL_SPEEDUP = 0.5  # interval factor after a poll that found new articles
+POLL_SLOWDOWN = 1.5  # interval factor after a poll that found nothing
+
+FRONT_PAGE_SIZE = 10  # first entries of a feed or listing page count as front page
+SEEN_RETENTION_DAYS = 14  # feeds only show recent articles, older URLs are forgotten
+SCRAPE_CONCURRENCY = 3
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("DAEMON_LLM_RPM", 20))
+NLP_BATCH_WAIT = 10  # seconds to wait for an LLM batch to fill up
+REFRESH_INTERVAL = float(os.getenv("DAEMON_REFRESH_INTERVAL", 900))  # importance + snapshots
+MAX_ATTEMPTS = 4  # scrape/NLP/graph failures before an article is given up on
+RETRY_BACKOFF = 60  # seconds before the first retry, doubled after every failure
+
+
+def entry_timestamp(entry, default):
+    if entry.published:
+        try:
+            return datetime.fromisoformat(entry.published).timestamp()
+        except ValueError:
+            pass
+    return default
+
+
+class ArticleQueue:
+    """Articles waiting to be scraped: front page before backfill, newest first within each."""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._available = asyncio.Event()
+
+    def push(self, item):
+        heapq.heappush(self._heap, ((item["tier"], -item["timestamp"]), next(self._counter), item))
+        self._available.set()
+
+    async def pop(self):
+        while not self._heap:
+            self._available.clear()
+            await self._available.wait()
+        return heapq.heappop(self._heap)[2]
+
+    def items(self):
+        return [item for _, _, item in sorted(self._heap)]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class RateLimiter:
+    """Spaces calls evenly instead of letting them burst."""
+
+    def __init__(self, per_minute):
+        self.interval = 60 / per_minute if per_minute > 0 else 0
+        self.next_slot = 0
+
+    async def wait(self):
+        now = time.monotonic()
+        delay = self.next_slot - now
+        self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class Daemon:
+    def __init__(self, graph, sources, state_path=STATE_PATH):
+        self.graph = graph
+        self.sources = sources
+        self.state_path = state_path
+
+        self.queue = ArticleQueue()
+        # Small hand-off queues: scraping can't run far ahead of the LLM, and a shutdown
+        # only has to drain a batch or two
+        self.scraped = asyncio.Queue(maxsize=nlp.BATCH_MAX_ARTICLES)
+        self.records = asyncio.Queue(maxsize=nlp.BATCH_MAX_ARTICLES)
+        self.in_flight = {}  # url -> queue item, between leaving the queue and the graph write
+        self.retrying = {}  # url -> queue item, waiting out its backoff before going back to the queue
+        self.pending = set()  # urls in the queue, in flight or retrying; seen only once written
+        self.llm_limiter = RateLimiter(LLM_REQUESTS_PER_MINUTE)
+        self.stopping = asyncio.Event()
+        self.written = 0
+
+        self.seen = {}  # url -> written to the graph or given up on (unix time)
+        self.source_state = {}  # source name -> {"interval", "next_poll"}
+        self.load_state()
+
+    # State
+    def load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {}
+        self.seen = state.get("seen", {})
+        self.source_state = state.get("sources", {})
+        for item in state.get("pending", []):
+            self.push(item)
+
+        # Articles from earlier full runs are already in the graph
+        now = time.time()
+        for url in self.graph.article_urls():
+            self.seen.setdefault(url, now)
+        print(Fore.CYAN + f"📂 {len(self.seen)} known articles, {len(self.queue)} pending from last run")
+
+    def save_state(self):
+        # Forget old URLs in memory too, the daemon runs for months
+        cutoff = time.time() - SEEN_RETENTION_DAYS * 24 * 3600
+        self.seen = {url: seen_at for url, seen_at in self.seen.items() if seen_at >= cutoff}
+        state = {
+            "sources": self.source_state,
+            "seen": self.seen,
+            "pending": list(self.in_flight.values()) + list(self.retrying.values()) + self.queue.items()
+        }
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        # Write then rename, a crash mid-write must not lose the seen set
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(temp_path, self.state_path)
+
+    # Queue bookkeeping
+    def push(self, item):
+        self.retrying.pop(item["entry"]["url"], None)
+        self.pending.add(item["entry"]["url"])
+        self.queue.push(item)
+
+    def done(self, item):
+        url = item["entry"]["url"]
+        self.in_flight.pop(url, None)
+        self.pending.discard(url)
+        self.seen[url] = time.time()
+
+    def retry(self, item, reason):
+        """Back to the queue after a backoff; given up (and marked seen) after MAX_ATTEMPTS."""
+        url = item["entry"]["url"]
+        self.in_flight.pop(url, None)
+        item["attempts"] = item.get("attempts", 0) + 1
+        if item["attempts"] >= MAX_ATTEMPTS:
+            print(Fore.RED + f"🚨 Giving up on {url} after {item['attempts']} attempts: {reason}")
+            self.done(item)
+            return
+        delay = RETRY_BACKOFF * 2 ** (item["attempts"] - 1)
+        print(Fore.YELLOW + f"⚠️ {reason} for {url}, retrying in {delay:.0f}s")
+        self.retrying[url] = item
+        asyncio.get_running_loop().call_later(delay, self.push, item)
+
+    # Discovery
+    def enqueue(self, source, entries, polled_at):
+        new = 0
+        for position, (entry, rules) in enumerate(entries):
+            if entry.url in self.seen or entry.url in self.pending:
+                continue
+            # Queue items are plain dicts, they are saved as JSON on shutdown
+            self.push({
+                "source": source,
+                "entry": asdict(entry),
+                "rules": rules,
+                "tier": 0 if position < FRONT_PAGE_SIZE else 1,
+                "timestamp": entry_timestamp(entry, polled_at)
+            })
+            new += 1
+        return new
+
+    async def poll_source(self, session, source):
+        state = self.source_state.setdefault(source["name"], {"interval": POLL_INTERVAL, "next_poll": 0})
+        while True:
+            delay = state["next_poll"] - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            polled_at = time.time()
+            try:
+                new = self.enqueue(source, await news_scraper.discover_site(session, source), polled_at)
+            except Exception as e:
+                print(Fore.RED + f"🚨 Polling {source['name']} failed: {e}")
+                new = 0
+
+            factor = POLL_SPEEDUP if new else POLL_SLOWDOWN
+            state["interval"] = min(MAX_POLL_INTERVAL, max(MIN_POLL_INTERVAL, state["interval"] * factor))
+            state["next_poll"] = polled_at + state["interval"]
+            print(f"{Fore.CYAN}🔁 {source['name'][:15]:<15} | {new} new, next poll in {state['interval']:.0f}s, "
+                  f"{len(self.queue)} queued")
+            self.save_state()
+
+    # Pipeline stages
+    async def scrape_worker(self, session):
+        while True:
+            item = await self.queue.pop()
+            url = item["entry"]["url"]
+            self.in_flight[url] = item
+            handed_off = False
+            try:
+                entry, source = news_scraper.FeedEntry(**item["entry"]), item["source"]
+                body = await news_scraper.extract_article_body(session, entry.url, item["rules"], source["name"])
+                if not body:
+                    self.retry(item, "No text")
+                    continue
+                await self.scraped.put((item, news_scraper.build_article(entry, source["name"], source["bias"], body)))
+                handed_off = True
+            except asyncio.CancelledError:
+                # Shutdown: stays in flight, save_state keeps it as pending
+                handed_off = True
+                raise
+            except Exception as e:
+                self.retry(item, f"Scraping failed ({e})")
+            finally:
+                # Otherwise a failed item would sit in flight forever
+                if not handed_off:
+                    self.in_flight.pop(url, None)
+
+    async def nlp_worker(self):
+        try:
+            extractor = await asyncio.to_thread(nlp.get_extractor)
+        except Exception as e:
+            if nlp.OFFLINE:
+                print(Fore.RED + f"🚨 Local NER ({nlp.NER_BACKEND}) failed to load and NLP_OFFLINE=1 needs it: {e}")
+                self.stopping.set()
+                await self.records.put(None)
+                return
+            print(Fore.YELLOW + f"⚠️ Local NER ({nlp.NER_BACKEND}) failed to load, the LLM extracts entities: {e}")
+            extractor = None
+
+        loop = asyncio.get_running_loop()
+        done = False
+        try:
+            while not done:
+                # Wait for the first article, then give the batch a few seconds to fill up
+                batch = [await self.scraped.get()]
+                deadline = loop.time() + NLP_BATCH_WAIT
+                while batch[-1] is not None and len(batch) < nlp.BATCH_MAX_ARTICLES:
+                    try:
+                        batch.append(await asyncio.wait_for(self.scraped.get(), deadline - loop.time()))
+                    except asyncio.TimeoutError:
+                        break
+                if batch[-1] is None:
+                    batch.pop()
+                    done = True
+                if batch:
+                    await self.analyze(batch, extractor)
+        finally:
+            # The writer stops on this, also when the loop above died
+            await self.records.put(None)
+
+    async def analyze(self, batch, extractor):
+        items = [item for item, _ in batch]
+        # nlp works on the same dicts nlp.py reads from data/serbian_news_articles.json
+        articles = [asdict(article) for _, article in batch]
+        handled = set()
+        try:
+            local_results = (await asyncio.to_thread(extractor.extract, articles) if extractor
+                             else [None] * len(articles))
+            entities = [nlp.local_entities(local) for local in local_results]
+            for group in nlp.plan_batches(articles, entities, budget=0 if nlp.OFFLINE else nlp.BATCH_TOKENS):
+                if not nlp.OFFLINE:
+                    await self.llm_limiter.wait()
+                results = await nlp.process_batch([articles[i] for i in group], [local_results[i] for i in group])
+                for i, record in zip(group, results):
+                    handled.add(i)
+                    if record:
+                        await self.records.put((items[i], record.to_dict(articles[i]["text"])))
+                    else:
+                        self.retry(items[i], "No NLP result")
+        except Exception as e:
+            print(Fore.RED + f"🚨 NLP failed for {len(batch)} articles: {e}")
+            for i, item in enumerate(items):
+                if i not in handled:
+                    self.retry(item, "NLP failed")
+
+    async def graph_worker(self):
+        while True:
+            queued = await self.records.get()
+            if queued is None:
+                return
+            item, record = queued
+            try:
+                await asyncio.to_thread(self.graph.create_article_with_entities_and_relations, record)
+            except Exception as e:
+                self.retry(item, f"Graph write failed ({e})")
+                continue
+            self.done(item)
+            self.written += 1
+            print(Fore.GREEN + f"✔ {record['article_source']}: {record['article_title'][:60]}")
+
+    async def refresh_worker(self):
+        """Importance scores and snapshots are whole-graph passes, run them periodically."""
+        refreshed_at = self.written
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL)
+            if self.written == refreshed_at:
+                continue
+            refreshed_at = self.written
+            try:
+                await asyncio.to_thread(self.graph.compute_entity_importance)
+                await asyncio.to_thread(export_snapshots, self.graph.driver)
+            except Exception as e:
+                print(Fore.RED + f"🚨 Refresh failed: {e}")
+
+    # Lifecycle
+    def install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stopping.set)
+            except NotImplementedError:
+                # Windows event loops have no add_signal_handler
+                signal.signal(sig, lambda *_: loop.call_soon_threadsafe(self.stopping.set))
+
+    async def run(self):
+        self.install_signal_handlers()
+        print(Fore.CYAN + f"🚀 Watching {len(self.sources)} sources, Ctrl+C to stop\n")
+
+        async with aiohttp.ClientSession() as session:
+            feeders = [asyncio.create_task(self.poll_source(session, source)) for source in self.sources]
+            feeders += [asyncio.create_task(self.scrape_worker(session)) for _ in range(SCRAPE_CONCURRENCY)]
+            feeders.append(asyncio.create_task(self.refresh_worker()))
+            analyzer = asyncio.create_task(self.nlp_worker())
+            writer = asyncio.create_task(self.graph_worker())
+
+            await self.stopping.wait()
+            print(Fore.YELLOW + "\n⏹ Stopping: finishing scraped articles, saving the rest...")
+            for task in feeders:
+                task.cancel()
+            await asyncio.gather(*feeders, return_exceptions=True)
+            # A finished analyzer has already stopped the writer, and nothing would read the sentinel
+            if not analyzer.done():
+                await self.scraped.put(None)
+            await asyncio.gather(analyzer, writer, return_exceptions=True)
+
+        self.save_state()
+        print(Fore.GREEN + f"✔ {self.written} articles written, {len(self.pending)} "
+                           f"saved for the next run in {self.state_path}")
+
+
+async def main(graph, sources, state_path=STATE_PATH):
+    # Queues and events are created inside the running loop
+    await Daemon(graph, sources, state_path).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll news sources and ingest new articles continuously")
+    parser.add_argument("--state", default=STATE_PATH, help="state file (seen URLs, intervals, pending articles)")
+    args = parser.parse_args()
+
+    graph = ArticleGraph(URI, USER, PASSWORD)
+    try:
+        graph.create_indexes()
+        asyncio.run(main(graph, news_scraper.SOURCES, args.state))
+    finally:
+        graph.close()
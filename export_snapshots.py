@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import hashlib
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+from tqdm import tqdm
+from colorama import Fore, init
+
+from app import app, GRAPH_QUERY, SNAPSHOT_DIR, build_graph
+
+load_dotenv()
+init(autoreset=True)
+
+URI = os.getenv("NEO4J_URI")
+USER = os.getenv("NEO4J_USER")
+PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+OUTPUT_DIR = os.path.join("static", SNAPSHOT_DIR)
+SNAPSHOT_VERSION = 1
+LAYOUT_SCALE = 1000  # coordinates are stored as integers in [0, LAYOUT_SCALE]
+LAYOUT_ITERATIONS = 100
+GLOBAL_NODE_LIMIT = 1000
+
+ARTICLE_IDS_QUERY = """
+    MATCH (a:Article)
+    RETURN elementId(a) AS id
+"""
+
+# The $limit most important entities that have an entity-to-entity relationship, and the
+# relationships between them; the rest of the graph never leaves the database
+GLOBAL_QUERY = """
+    MATCH (e)
+    WHERE NOT e:Article AND EXISTS { MATCH (e)--(other) WHERE NOT other:Article }
+    WITH e
+    ORDER BY coalesce(e.importance, 0) DESC
+    LIMIT $limit
+    WITH collect(e) AS kept
+    UNWIND kept AS e
+    MATCH (e)-[r]->(t)
+    WHERE t IN kept
+    RETURN e, r, t
+"""
+
+
+def force_layout(node_count, edges, iterations=LAYOUT_ITERATIONS, seed=0):
+    """Fruchterman-Reingold layout with dense numpy arrays, returns integer (x, y) columns."""
+    if node_count == 0:
+        return [], []
+    rng = np.random.default_rng(seed)
+    pos = rng.random((node_count, 2))
+    if node_count > 1:
+        adjacency = np.zeros((node_count, node_count))
+        for source, target in edges:
+            if source != target:
+                adjacency[source, target] = adjacency[target, source] = 1.0
+
+        k = np.sqrt(1.0 / node_count)
+        temperature = 0.1
+        cooling = temperature / (iterations + 1)
+        for _ in range(iterations):
+            delta = pos[:, None, :] - pos[None, :, :]
+            distance = np.clip(np.linalg.norm(delta, axis=-1), 0.01, None)
+            # repulsion between all pairs, attraction along edges
+            force = k * k / distance ** 2 - adjacency * distance / k
+            displacement = np.einsum("ijk,ij->ik", delta, force)
+            length = np.clip(np.linalg.norm(displacement, axis=-1), 0.01, None)
+            pos += displacement * (temperature / length)[:, None]
+            temperature -= cooling
+
+    pos -= pos.min(axis=0)
+    span = pos.max(axis=0)
+    span[span == 0] = 1.0
+    pos = np.rint(pos / span * LAYOUT_SCALE).astype(int)
+    return pos[:, 0].tolist(), pos[:, 1].tolist()
+
+
+def scale(values):
+    # Integers in [0, LAYOUT_SCALE] relative to the largest value, like the coordinates
+    top = max(values, default=0) or 1
+    return [round(value / top * LAYOUT_SCALE) for value in values]
+
+
+def encode_snapshot(graph):
+    """Compact columnar form of a build_graph() payload with a precomputed layout.
+
+    Node ids become their row index and every string goes through one string table.
+    MENTIONS edges are dropped because the client never draws them.
+    """
+    strings = []
+    string_ids = {}
+
+    def string_id(value):
+        value = str(value)
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    node_index = {}
+    labels, groups, importance = [], [], []
+    for node in graph["nodes"]:
+        if node["id"] in node_index:
+            continue
+        node_index[node["id"]] = len(labels)
+        labels.append(string_id(node["label"]))
+        groups.append(string_id(node["group"]))
+        importance.append(node.get("importance") or 0)
+
+    sources, targets, edge_labels = [], [], []
+    for edge in graph["edges"]:
+        if edge["label"] == "MENTIONS" or edge["from"] not in node_index or edge["to"] not in node_index:
+            continue
+        sources.append(node_index[edge["from"]])
+        targets.append(node_index[edge["to"]])
+        edge_labels.append(string_id(edge["label"]))
+
+    xs, ys = force_layout(len(labels), zip(sources, targets))
+    return {
+        "v": SNAPSHOT_VERSION,
+        "strings": strings,
+        "nodes": {"label": labels, "group": groups, "x": xs, "y": ys, "importance": scale(importance)},
+        "edges": {"source": sources, "target": targets, "label": edge_labels}
+    }
+
+
+def global_graph(records):
+    """Entity-to-entity graph from GLOBAL_QUERY records (already cut to the most important entities)."""
+    nodes, edges, seen = [], [], set()
+    for record in records:
+        start, rel, end = record["e"], record["r"], record["t"]
+        for node in (start, end):
+            if node.element_id not in seen:
+                seen.add(node.element_id)
+                nodes.append({
+                    "id": node.element_id,
+                    "label": node.get("name", node.element_id),
+                    "group": next(iter(node.labels), "Entity").lower(),
+                    "importance": node.get("importance", 0)
+                })
+        edges.append({"from": start.element_id, "to": end.element_id, "label": rel.type})
+    return {"nodes": nodes, "edges": edges}
+
+
+def write_snapshot(name, snapshot):
+    payload = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    filename = f"{name}.{hashlib.sha1(payload).hexdigest()[:10]}.json"
+    path = os.path.join(OUTPUT_DIR, filename)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(payload)
+    return filename
+
+
+def read_all(driver, query, **params):
+    with driver.session() as session:
+        return session.execute_read(lambda tx: list(tx.run(query, **params)))
+
+
+def export_snapshots(driver, include_global=False, global_limit=GLOBAL_NODE_LIMIT):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    article_ids = [record["id"] for record in read_all(driver, ARTICLE_IDS_QUERY)]
+    print(Fore.CYAN + f"🗺  Exporting graph snapshots for {len(article_ids)} articles...\n")
+
+    manifest = {"v": SNAPSHOT_VERSION, "articles": {}, "global": None}
+    for article_id in tqdm(article_ids, desc="Snapshots", colour='blue', leave=False, unit="article"):
+        graph = build_graph(read_all(driver, GRAPH_QUERY, article_id=article_id,
+                                     limit=app.config["GRAPH_NODE_LIMIT"]))
+        # element ids contain ':' which is not allowed in Windows file names
+        name = re.sub(r"[^A-Za-z0-9_-]", "_", article_id)
+        manifest["articles"][article_id] = write_snapshot(name, encode_snapshot(graph))
+
+    if include_global:
+        graph = global_graph(read_all(driver, GLOBAL_QUERY, limit=global_limit))
+        manifest["global"] = write_snapshot("global", encode_snapshot(graph))
+
+    # Manifest goes last so the client never sees a file name that is not written yet
+    with open(os.path.join(OUTPUT_DIR, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+
+    current = set(manifest["articles"].values()) | {manifest["global"], "manifest.json"}
+    stale = [f for f in os.listdir(OUTPUT_DIR) if f.endswith(".json") and f not in current]
+    for filename in stale:
+        os.remove(os.path.join(OUTPUT_DIR, filename))
+
+    print(f"{Fore.GREEN}✔ {len(article_ids)} snapshots written to {OUTPUT_DIR} ({len(stale)} stale removed)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute compact graph snapshots for the frontend")
+    parser.add_argument("--global", dest="include_global", action="store_true",
+                        help="also export the entity graph across all articles")
+    parser.add_argument("--global-limit", type=int, default=GLOBAL_NODE_LIMIT,
+                        help="max entities in the global graph (most important first)")
+    args = parser.parse_args()
+
+    driver = GraphDatabase.driver(URI, auth=(USER, PASSWORD))
+    try:
+        export_snapshots(driver, args.include_global, args.global_limit)
+    finally:
+        driver.close()
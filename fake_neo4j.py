@@ -0,0 +1,540 @@
+"""
+In-memory stand-in for the Neo4j driver, used by benchmark.py.
+
+Understands only the Cypher statements issued by populate_graph.ArticleGraph,
+app.py and export_snapshots.py, matched by their shape. Anything else raises
+NotImplementedError so a changed query shows up immediately instead of silently
+returning nothing.
+
+Write transactions take an exclusive lock on every node they merge, set or
+attach a relationship to, held until the transaction ends (including its
+simulated round-trips). A transaction that needs a lock held by another one
+waits, and if that would close a wait cycle it fails with a deadlock
+TransientError, as Neo4j does. lock_waits and deadlocks count both.
+"""
+import re
+import time
+import random
+import asyncio
+import threading
+from collections.abc import Mapping
+
+from neo4j.exceptions import TransientError
+
+
+class FakeEntity(Mapping):
+    def __init__(self, element_id, properties):
+        self.element_id = element_id
+        self._properties = properties
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __iter__(self):
+        return iter(self._properties)
+
+    def __len__(self):
+        return len(self._properties)
+
+    def __hash__(self):
+        return hash(self.element_id)
+
+    def __eq__(self, other):
+        return isinstance(other, FakeEntity) and other.element_id == self.element_id
+
+
+class FakeNode(FakeEntity):
+    def __init__(self, element_id, labels, properties):
+        super().__init__(element_id, properties)
+        self.labels = frozenset(labels)
+
+
+class FakeRelationship(FakeEntity):
+    def __init__(self, element_id, rel_type, start_node, end_node, properties):
+        super().__init__(element_id, properties)
+        self.type = rel_type
+        self.start_node = start_node
+        self.end_node = end_node
+
+
+class FakeRecord(dict):
+    def data(self):
+        return dict(self)
+
+
+class FakeResult:
+    def __init__(self, records):
+        self._records = records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __aiter__(self):
+        return self._async_iter()
+
+    async def _async_iter(self):
+        for record in self._records:
+            yield record
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def data(self):
+        return [record.data() for record in self._records]
+
+    def consume(self):
+        return None
+
+
+def _normalize(query):
+    return " ".join(query.split())
+
+
+def _assignments(set_clause):
+    # "a.url = $url, a.source = $source" -> {"url": "url", "source": "source"}
+    return dict(re.findall(r"\w+\.(\w+) = \$(\w+)", set_clause))
+
+
+class GraphStore:
+    """Thread-safe in-memory property graph with per-query handlers."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.lock_released = threading.Condition(self.lock)
+        self.node_locks = {}  # node id -> transaction holding it
+        self.waiting = {}  # transaction -> transaction it waits for
+        self.lock_waits = 0
+        self.deadlocks = 0
+        self._local = threading.local()
+        self.nodes = {}
+        self.outgoing = {}
+        self.incoming = {}
+        self.node_index = {}  # (label, key, value) -> node
+        self.rel_index = {}  # (start id, type, end id, frozen props) -> relationship, for MERGE
+        self.relationship_count = 0
+        self._next_id = 0
+        self._handlers = [
+            (re.compile(r"^MERGE \(a:Article \{title: \$title\}\) SET (.*)$"), self._merge_article),
+            (re.compile(r"^MERGE \(e:(\w+) \{name: \$name\}\)$"), self._merge_entity),
+            (re.compile(r"^MATCH \(a:Article \{title: \$title\}\) MATCH \(e:(\w+) \{name: \$name\}\) "
+                        r"MERGE \(a\)-\[:MENTIONS\]->\(e\)$"), self._merge_mention),
+            (re.compile(r"^MATCH \(from:(\w+) \{name: \$from_name\}\) MATCH \(to:(\w+) \{name: \$to_name\}\) "
+                        r"MERGE \(from\)-\[r:(\w+) \{article: \$article_title\}\]->\(to\)"
+                        r"( ON CREATE SET r.raw = \$raw)?$"), self._merge_relation),
+            (re.compile(r"^UNWIND \$rows AS row MERGE \(a:Article \{title: row.title\}\) SET (.*)$"),
+             self._merge_article_rows),
+            (re.compile(r"^UNWIND \$rows AS name MERGE \(e:(\w+) \{name: name\}\)$"), self._merge_entity_rows),
+            (re.compile(r"^UNWIND \$rows AS row MATCH \(a:Article \{title: row.title\}\) "
+                        r"MATCH \(e:(\w+) \{name: row.name\}\) MERGE \(a\)-\[:MENTIONS\]->\(e\)$"),
+             self._merge_mention_rows),
+            (re.compile(r"^UNWIND \$rows AS row MATCH \(from:(\w+) \{name: row.from_name\}\) "
+                        r"MATCH \(to:(\w+) \{name: row.to_name\}\) "
+                        r"MERGE \(from\)-\[r:(\w+) \{article: row.article_title\}\]->\(to\) "
+                        r"ON CREATE SET r.raw = row.raw$"), self._merge_relation_rows),
+            (re.compile(r"^UNWIND \$rows AS title MATCH \(a:Article \{title: title\}\) RETURN count\(a\) AS found$"),
+             self._count_articles),
+            (re.compile(r"^UNWIND \$rows AS name MATCH \(e:(\w+) \{name: name\}\) RETURN count\(e\) AS found$"),
+             self._count_entities),
+            (re.compile(r"^UNWIND \$rows AS row MATCH \(a:Article \{title: row.title\}\)-\[r:MENTIONS\]->"
+                        r"\(e:(\w+) \{name: row.name\}\) RETURN count\(r\) AS found$"), self._count_mentions),
+            (re.compile(r"^UNWIND \$rows AS row MATCH \(from:(\w+) \{name: row.from_name\}\)"
+                        r"-\[r:(\w+) \{article: row.article_title\}\]-> ?\(to:(\w+) \{name: row.to_name\}\) "
+                        r"RETURN count\(r\) AS found$"), self._count_relations),
+            (re.compile(r"collect\(a\) AS articles"), self._read_index),
+            (re.compile(r"OPTIONAL MATCH \(connected\)-\[r2\]->\(other_connected\)"), self._read_graph),
+            (re.compile(r"^MATCH \(a:Article\) WHERE elementId\(a\) = \$article_id"), self._read_article),
+            (re.compile(r"^MATCH \(a:Article\) RETURN elementId\(a\) AS id$"), self._read_article_ids),
+            (re.compile(r"^MATCH \(a:Article\) RETURN a.url AS url$"), self._read_article_urls),
+            (re.compile(r"^MATCH \(e\) WHERE NOT e:Article AND e.name IS NOT NULL "
+                        r"RETURN e.name AS name, labels\(e\)\[0\] AS label$"), self._read_entity_names),
+            (re.compile(r"^MATCH \(e\) WHERE NOT e:Article AND EXISTS \{ MATCH \(e\)--\(other\) "
+                        r"WHERE NOT other:Article \} WITH e ORDER BY coalesce\(e.importance, 0\) DESC LIMIT \$limit"),
+             self._read_entity_relations),
+            (re.compile(r"^MATCH \(s\)-\[r\]->\(t\) RETURN elementId\(s\) AS source, elementId\(t\) AS target, "
+                        r"count\(\*\) AS weight$"), self._read_edge_list),
+            (re.compile(r"^MATCH \(a:Article\)-\[:MENTIONS\]->\(e\) RETURN elementId\(e\) AS id, a.bias AS bias, "
+                        r"count\(\*\) AS mentions$"), self._read_mention_counts),
+            (re.compile(r"^UNWIND \$rows AS row MATCH \(n\) WHERE elementId\(n\) = row.id SET n \+= row.properties$"),
+             self._set_properties),
+            (re.compile(r"^CREATE (CONSTRAINT|INDEX) "), self._no_op),
+            (re.compile(r"^MATCH \(n\) DETACH DELETE n$"), self._delete_all),
+        ]
+
+    def run(self, query, params, tx=None):
+        text = _normalize(query)
+        for pattern, handler in self._handlers:
+            match = pattern.search(text)
+            if match:
+                with self.lock:
+                    # Thread-local: waiting for a node lock lets other threads run handlers
+                    self._local.tx = tx
+                    return FakeResult(handler(match, params))
+        raise NotImplementedError(f"fake_neo4j does not understand: {text}")
+
+    # Node locks
+    def _lock(self, node):
+        tx = self._local.tx
+        if tx is None:
+            return
+        waited = False
+        while True:
+            holder = self.node_locks.get(node.element_id)
+            if holder is None or holder is tx:
+                break
+            blocker = holder
+            while blocker is not None and blocker is not tx:
+                blocker = self.waiting.get(blocker)
+            if blocker is tx:
+                self.deadlocks += 1
+                raise TransientError("Neo.TransientError.Transaction.DeadlockDetected (fake)")
+            if not waited:
+                self.lock_waits += 1
+                waited = True
+            self.waiting[tx] = holder
+            try:
+                self.lock_released.wait()
+            finally:
+                del self.waiting[tx]
+        self.node_locks[node.element_id] = tx
+        tx.locks.add(node.element_id)
+
+    def release(self, tx):
+        with self.lock:
+            for node_id in tx.locks:
+                del self.node_locks[node_id]
+            tx.locks.clear()
+            self.lock_released.notify_all()
+
+    # Storage helpers
+    def _new_id(self):
+        self._next_id += 1
+        return f"4:fake:{self._next_id}"
+
+    def _merge_node(self, label, key, value):
+        node = self.node_index.get((label, key, value))
+        if node is None:
+            node = FakeNode(self._new_id(), [label], {key: value})
+            self.nodes[node.element_id] = node
+            self.outgoing[node.element_id] = []
+            self.incoming[node.element_id] = []
+            self.node_index[(label, key, value)] = node
+        self._lock(node)
+        return node
+
+    def _merge_rel(self, start, rel_type, end, properties):
+        self._lock(start)
+        self._lock(end)
+        key = (start.element_id, rel_type, end.element_id, frozenset(properties.items()))
+        if key in self.rel_index:
+            return self.rel_index[key], False
+        rel = FakeRelationship(self._new_id(), rel_type, start, end, dict(properties))
+        self.rel_index[key] = rel
+        self.outgoing[start.element_id].append(rel)
+        self.incoming[end.element_id].append(rel)
+        self.relationship_count += 1
+        return rel, True
+
+    def articles(self):
+        return [node for node in self.nodes.values() if "Article" in node.labels]
+
+    # Write handlers
+    def _merge_article(self, match, params):
+        node = self._merge_node("Article", "title", params["title"])
+        for prop, param in _assignments(match.group(1)).items():
+            node._properties[prop] = params[param]
+        return []
+
+    def _merge_entity(self, match, params):
+        self._merge_node(match.group(1), "name", params["name"])
+        return []
+
+    def _merge_mention(self, match, params):
+        article = self.node_index.get(("Article", "title", params["title"]))
+        entity = self.node_index.get((match.group(1), "name", params["name"]))
+        if article and entity:
+            self._merge_rel(article, "MENTIONS", entity, {})
+        return []
+
+    def _merge_relation(self, match, params):
+        from_label, to_label, rel_type, on_create = match.groups()
+        start = self.node_index.get((from_label, "name", params["from_name"]))
+        end = self.node_index.get((to_label, "name", params["to_name"]))
+        if start and end:
+            rel, created = self._merge_rel(start, rel_type, end, {"article": params["article_title"]})
+            if created and on_create:
+                rel._properties["raw"] = params["raw"]
+        return []
+
+    def _merge_article_rows(self, match, params):
+        assignments = re.findall(r"\w+\.(\w+) = row\.(\w+)", match.group(1))
+        for row in params["rows"]:
+            node = self._merge_node("Article", "title", row["title"])
+            for prop, field in assignments:
+                node._properties[prop] = row[field]
+        return []
+
+    def _merge_entity_rows(self, match, params):
+        for name in params["rows"]:
+            self._merge_node(match.group(1), "name", name)
+        return []
+
+    def _merge_mention_rows(self, match, params):
+        for row in params["rows"]:
+            self._merge_mention(match, row)
+        return []
+
+    def _merge_relation_rows(self, match, params):
+        from_label, to_label, rel_type = match.groups()
+        for row in params["rows"]:
+            start = self.node_index.get((from_label, "name", row["from_name"]))
+            end = self.node_index.get((to_label, "name", row["to_name"]))
+            if start and end:
+                rel, created = self._merge_rel(start, rel_type, end, {"article": row["article_title"]})
+                if created:
+                    rel._properties["raw"] = row["raw"]
+        return []
+
+    def _set_properties(self, match, params):
+        for row in params["rows"]:
+            node = self.nodes.get(row["id"])
+            if node is not None:
+                self._lock(node)
+                node._properties.update(row["properties"])
+        return []
+
+    def _no_op(self, match, params):
+        return []
+
+    def _delete_all(self, match, params):
+        self.__init__()
+        return []
+
+    # Read handlers
+    def _read_index(self, match, params):
+        groups = {}
+        for article in self.articles():
+            groups.setdefault((article.get("bias"), article.get("source")), []).append(article)
+        return [FakeRecord(bias=bias, source=source, articles=articles)
+                for (bias, source), articles in sorted(groups.items(), key=lambda g: (g[0][0] or "", g[0][1] or ""))]
+
+    def _read_graph(self, match, params):
+        article = self.nodes.get(params["article_id"])
+        if article is None or "Article" not in article.labels:
+            return []
+        title = article.get("title")
+        mentioned = {rel.end_node.element_id: rel for rel in self.outgoing[article.element_id]}
+        candidates = {}
+        for rel in self.outgoing[article.element_id]:
+            candidates[rel.end_node.element_id] = rel.end_node
+            for r2 in self.outgoing[rel.end_node.element_id]:
+                if r2.get("article") == title:
+                    candidates[r2.end_node.element_id] = r2.end_node
+            for r2 in self.incoming[rel.end_node.element_id]:
+                if r2.get("article") == title:
+                    candidates[r2.start_node.element_id] = r2.start_node
+        kept = sorted(candidates.values(), key=lambda node: node.get("importance") or 0,
+                      reverse=True)[:params["limit"]]
+        kept_ids = {node.element_id for node in kept}
+        records = []
+        for connected in kept:
+            rel = mentioned.get(connected.element_id)
+            second = [r2 for r2 in self.outgoing[connected.element_id]
+                      if r2.get("article") == title and r2.end_node.element_id in kept_ids]
+            if not second:
+                records.append(FakeRecord(r=rel, connected=connected, r2=None, other_connected=None))
+            for r2 in second:
+                records.append(FakeRecord(r=rel, connected=connected, r2=r2, other_connected=r2.end_node))
+        return records
+
+    def _read_article(self, match, params):
+        article = self.nodes.get(params["article_id"])
+        if article is None or "Article" not in article.labels:
+            return []
+        return [FakeRecord(a=article)]
+
+    def _read_article_ids(self, match, params):
+        return [FakeRecord(id=article.element_id) for article in self.articles()]
+
+    def _count_articles(self, match, params):
+        return [FakeRecord(found=sum(("Article", "title", title) in self.node_index for title in params["rows"]))]
+
+    def _count_entities(self, match, params):
+        return [FakeRecord(found=sum((match.group(1), "name", name) in self.node_index for name in params["rows"]))]
+
+    def _count_mentions(self, match, params):
+        found = 0
+        for row in params["rows"]:
+            article = self.node_index.get(("Article", "title", row["title"]))
+            entity = self.node_index.get((match.group(1), "name", row["name"]))
+            if article and entity:
+                found += (article.element_id, "MENTIONS", entity.element_id, frozenset()) in self.rel_index
+        return [FakeRecord(found=found)]
+
+    def _count_relations(self, match, params):
+        from_label, rel_type, to_label = match.groups()
+        found = 0
+        for row in params["rows"]:
+            start = self.node_index.get((from_label, "name", row["from_name"]))
+            end = self.node_index.get((to_label, "name", row["to_name"]))
+            if start and end:
+                key = (start.element_id, rel_type, end.element_id, frozenset({"article": row["article_title"]}.items()))
+                found += key in self.rel_index
+        return [FakeRecord(found=found)]
+
+    def _read_article_urls(self, match, params):
+        return [FakeRecord(url=article.get("url")) for article in self.articles()]
+
+    def _read_edge_list(self, match, params):
+        weights = {}
+        for rels in self.outgoing.values():
+            for rel in rels:
+                pair = (rel.start_node.element_id, rel.end_node.element_id)
+                weights[pair] = weights.get(pair, 0) + 1
+        return [FakeRecord(source=source, target=target, weight=weight) for (source, target), weight in weights.items()]
+
+    def _read_entity_names(self, match, params):
+        return [FakeRecord(name=node.get("name"), label=next(iter(node.labels))) for node in self.nodes.values()
+                if "Article" not in node.labels and node.get("name") is not None]
+
+    def _read_mention_counts(self, match, params):
+        counts = {}
+        for article in self.articles():
+            for rel in self.outgoing[article.element_id]:
+                if rel.type == "MENTIONS":
+                    key = (rel.end_node.element_id, article.get("bias"))
+                    counts[key] = counts.get(key, 0) + 1
+        return [FakeRecord(id=node_id, bias=bias, mentions=count) for (node_id, bias), count in counts.items()]
+
+    def _read_entity_relations(self, match, params):
+        relations = [rel for rels in self.outgoing.values() for rel in rels
+                     if "Article" not in rel.start_node.labels and "Article" not in rel.end_node.labels]
+        related = {node.element_id: node for rel in relations for node in (rel.start_node, rel.end_node)}
+        kept = set(sorted(related, key=lambda node_id: related[node_id].get("importance") or 0,
+                          reverse=True)[:params["limit"]])
+        return [FakeRecord(e=rel.start_node, r=rel, t=rel.end_node) for rel in relations
+                if rel.start_node.element_id in kept and rel.end_node.element_id in kept]
+
+
+# Sync driver (populate_graph, delete_graphs)
+class FakeTransaction:
+    def __init__(self, store, latency):
+        self._store = store
+        self._latency = latency
+        self.fail = False
+        self.write = False
+        self.locks = set()
+
+    def run(self, query, parameters=None, **kwargs):
+        # A deadlock victim, picked before it wrote anything so there is nothing to roll back
+        if self.fail:
+            self.fail = False
+            raise TransientError("Neo.TransientError.Transaction.DeadlockDetected (fake)")
+        result = self._store.run(query, {**(parameters or {}), **kwargs}, self if self.write else None)
+        # The round-trip comes after the locks are taken, so they are held for it
+        if self._latency:
+            time.sleep(self._latency)
+        return result
+
+
+class FakeSession:
+    def __init__(self, store, latency, transient_error_rate=0.0, driver_retries=3):
+        self._store = store
+        self._tx = FakeTransaction(store, latency)
+        self._transient_error_rate = transient_error_rate
+        self._driver_retries = driver_retries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        return self._tx.run(query, parameters, **kwargs)
+
+    def execute_read(self, fn, *args, **kwargs):
+        return fn(self._tx, *args, **kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        # The real driver reruns the whole function on transient errors, for up to
+        # max_transaction_retry_time; here a fixed number of times, without waiting
+        for attempt in range(self._driver_retries + 1):
+            self._tx.fail = bool(self._transient_error_rate) and random.random() < self._transient_error_rate
+            self._tx.write = True
+            try:
+                return fn(self._tx, *args, **kwargs)
+            except TransientError:
+                if attempt == self._driver_retries:
+                    raise
+            finally:
+                self._tx.write = False
+                self._store.release(self._tx)
+
+    def close(self):
+        pass
+
+
+class FakeDriver:
+    def __init__(self, store, latency=0.0, transient_error_rate=0.0, driver_retries=3):
+        self.store = store
+        self.latency = latency
+        self.transient_error_rate = transient_error_rate
+        self.driver_retries = driver_retries
+
+    def session(self, **config):
+        return FakeSession(self.store, self.latency, self.transient_error_rate, self.driver_retries)
+
+    def execute_query(self, query, parameters=None, **kwargs):
+        # (records, summary, keys) like the real driver; nothing here reads the other two
+        with self.session() as session:
+            records = session.execute_read(lambda tx: list(tx.run(query, parameters, **kwargs)))
+        return records, None, None
+
+    def close(self):
+        pass
+
+
+# Async driver (app.py)
+class FakeAsyncTransaction:
+    def __init__(self, store, latency):
+        self._store = store
+        self._latency = latency
+
+    async def run(self, query, parameters=None, **kwargs):
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return self._store.run(query, {**(parameters or {}), **kwargs})
+
+
+class FakeAsyncSession:
+    def __init__(self, store, latency):
+        self._tx = FakeAsyncTransaction(store, latency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, parameters=None, **kwargs):
+        return await self._tx.run(query, parameters, **kwargs)
+
+    async def execute_read(self, fn, *args, **kwargs):
+        return await fn(self._tx, *args, **kwargs)
+
+    execute_write = execute_read
+
+    async def close(self):
+        pass
+
+
+class FakeAsyncDriver:
+    def __init__(self, store, latency=0.0):
+        self.store = store
+        self.latency = latency
+
+    def session(self, **config):
+        return FakeAsyncSession(self.store, self.latency)
+
+    async def close(self):
+        pass
@@ -5,8 +5,13 @@ import asyncio
 import aiohttp
 from tqdm.asyncio import tqdm
 from colorama import Fore, init
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from urllib.parse import urljoin
+from xml.etree import ElementTree
+from email.utils import parsedate_to_datetime
+from datetime import datetime
+from dataclasses import dataclass, asdict
+from typing import Optional
 import time
 
 init(autoreset=True)
@@ -18,10 +23,36 @@ with open('sources.json', 'r', encoding='utf-8') as f:
 with open('scraping_rules.json', 'r', encoding='utf-8') as f:
     SCRAPING_RULES = json.load(f)
 
+# RSS/Atom feedovi ili news sitemap po domenu; sajtovi bez feeda idu preko listing stranice
+with open('feeds.json', 'r', encoding='utf-8') as f:
+    FEEDS = json.load(f)
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
+FEED_CHUNK_SIZE = 8192
+
+
+@dataclass(slots=True)
+class FeedEntry:
+    """An article found by discovery (feed or listing page), before its text is fetched."""
+    url: str
+    title: Optional[str]
+    guid: str
+    published: Optional[str]  # ISO 8601
+
+
+@dataclass(slots=True)
+class Article:
+    source: str
+    bias: str
+    title: str
+    url: str
+    guid: str
+    published: Optional[str]
+    text: str
+
 
 async def fetch_page(session, url):
     try:
@@ -58,16 +89,31 @@ def clean_paragraphs(body, scrape_all_p, site_name):
     return text_parts
 
 
+def container_strainer(selector):
+    # "div.post" -> only that subtree is built instead of the whole page; other selectors parse everything
+    match = re.fullmatch(r"(\w+)(?:\.([\w-]+))?", selector)
+    if not match:
+        return None
+    tag, css_class = match.groups()
+    if not css_class:
+        return SoupStrainer(tag)
+    # While parsing, class is still the raw attribute string ("post single"), not a list
+    return SoupStrainer(tag, attrs={"class": lambda value: value is not None and css_class in (
+        value.split() if isinstance(value, str) else value)})
+
+
 async def extract_article_body(session, article_url, rules, site_name):
     html = await fetch_page(session, article_url)
     if not html:
         return None
-    soup = BeautifulSoup(html, 'html.parser')
-    container = soup.select_one(rules.get("full_text_container", ""))
-    if container:
-        paragraphs = clean_paragraphs(container, rules.get("scrape_all_p", False), site_name)
-        return " ".join(paragraphs) if paragraphs else None
-    return None
+    selector = rules.get("full_text_container", "")
+    soup = BeautifulSoup(html, 'html.parser', parse_only=container_strainer(selector))
+    del html
+    container = soup.select_one(selector)
+    paragraphs = clean_paragraphs(container, rules.get("scrape_all_p", False), site_name) if container else []
+    # Tag trees are full of parent/child cycles, free them now instead of at the next GC pass
+    soup.decompose()
+    return " ".join(paragraphs) if paragraphs else None
 
 
 def is_politics_url(url):
@@ -75,56 +121,108 @@ def is_politics_url(url):
     return any(kw in url.lower() for kw in politics_keywords)
 
 
-async def process_article(session, item, rules, base_url, site_name, bias, article_pbar):
-    try:
-        link_tag = item.select_one(rules["link"])
-        title_tag = item.select_one(rules["title"])
-        if not link_tag or not title_tag:
-            return None
+def local_name(tag):
+    # "{http://www.w3.org/2005/Atom}entry" -> "entry"
+    return tag.rsplit('}', 1)[-1]
 
-        link = link_tag["href"]
 
-        title = title_tag.get_text(strip=True)
+def child_text(elem, *names):
+    for child in elem.iter():
+        if local_name(child.tag) in names and child.text and child.text.strip():
+            return child.text.strip()
+    return None
 
-        full_url = urljoin(base_url, link)
-        body = await extract_article_body(session, full_url, rules, site_name)
 
-        if body:
-            article_pbar.set_postfix_str(f"📰 {title[:30]}...", refresh=True)
-            article_pbar.update(1)
-            return {
-                "source": site_name,
-                "bias": bias,
-                "title": title,
-                "url": full_url,
-                "text": body
-            }
+def parse_date(value):
+    """RFC 822 (RSS) or ISO 8601 (Atom, sitemap) date as an ISO 8601 string."""
+    if not value:
         return None
-    except Exception as e:
-        print(Fore.RED + f"❌ Error processing article: {str(e)}")
+    try:
+        return parsedate_to_datetime(value).isoformat()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).isoformat()
+    except ValueError:
         return None
 
-async def scrape_site(session, source, position):
-    base_url = source["url"]
-    site_name = source["name"]
-    bias = source["bias"]
-    domain = base_url.split("//")[-1].split("/")[0]
-    sections = SCRAPING_RULES.get(domain, {})
 
-    if not sections:
-        tqdm.write(f"{Fore.YELLOW}⚠️ {site_name[:15]:<15} | No scraping rules")
-        return []
+def parse_feed_entry(elem):
+    """RSS <item>, Atom <entry> or sitemap <url> as a FeedEntry."""
+    tag = local_name(elem.tag)
+    if tag == "item":
+        url = child_text(elem, "link")
+        guid = child_text(elem, "guid")
+        published = child_text(elem, "pubDate", "date")
+    elif tag == "entry":
+        url = next((link.get("href") for link in elem if local_name(link.tag) == "link"
+                    and link.get("rel", "alternate") == "alternate"), None)
+        guid = child_text(elem, "id")
+        published = child_text(elem, "published", "updated")
+    else:
+        # news sitemap: <url><loc/><news:news><news:publication_date/><news:title/></news:news></url>
+        url = child_text(elem, "loc")
+        guid = None
+        published = child_text(elem, "publication_date", "lastmod")
+
+    if not url:
+        return None
+    return FeedEntry(url, child_text(elem, "title"), guid or url, parse_date(published))
 
-    html = await fetch_page(session, base_url)
-    if not html:
-        tqdm.write(f"{Fore.RED}⚠️ {site_name[:15]:<15} | Failed to fetch")
-        return []
 
-    soup = BeautifulSoup(html, 'html.parser')
-    article_items = []
+async def fetch_feed(session, url):
+    """Streams a feed through XMLPullParser, returns (entries, bytes read) or None on failure."""
+    parser = ElementTree.XMLPullParser(events=("end",))
+    entries = []
+    size = 0
+
+    def read_entries():
+        for _, elem in parser.read_events():
+            if local_name(elem.tag) in ("item", "entry", "url"):
+                entry = parse_feed_entry(elem)
+                if entry:
+                    entries.append(entry)
+                elem.clear()
+
+    try:
+        async with session.get(url, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=15)) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(FEED_CHUNK_SIZE):
+                size += len(chunk)
+                parser.feed(chunk)
+                read_entries()
+        parser.close()
+        read_entries()
+    except Exception as e:
+        print(Fore.RED + f"🚨 Failed to read feed {url}: {str(e)}")
+        return None
+    return entries, size
+
+
+async def discover_from_feeds(session, feed_urls):
+    """Politics entries from the configured feeds, or None if none of them could be read."""
+    entries, size, read = {}, 0, False
+    for feed_url in feed_urls:
+        result = await fetch_feed(session, feed_url)
+        if result is None:
+            continue
+        read = True
+        size += result[1]
+        for entry in result[0]:
+            if is_politics_url(entry.url):
+                entries.setdefault(entry.url, entry)
+    if not read:
+        return None
+    return list(entries.values()), size
+
+
+def discover_from_listing(soup, base_url, site_name, sections):
+    """Politics entries from the listing page, each with the rules of its section."""
+    found = {}
 
     for section in sections:
         rules = sections.get(section, {})
+        article_items = []
 
         # filtered_items = []
         # print("PAGE TITLE:", soup.title.text)
@@ -160,12 +258,79 @@ async def scrape_site(session, source, position):
         else:
             article_items.extend(soup.select(rules["container"]))
 
-    article_items = [item for item in article_items
-                     if is_politics_url(item.select_one(rules["link"])["href"])]
+        for item in article_items:
+            link_tag = item.select_one(rules["link"])
+            title_tag = item.select_one(rules["title"])
+            # Stavke bez linka ili naslova (reklame, prazni blokovi) se preskaču
+            if not link_tag or not link_tag.get("href") or not title_tag:
+                continue
+            url = urljoin(base_url, link_tag["href"])
+            if is_politics_url(url) and url not in found:
+                found[url] = (FeedEntry(url, title_tag.get_text(strip=True), url, None), rules)
+
+    return list(found.values())
+
+
+def build_article(entry, site_name, bias, body):
+    return Article(site_name, bias, entry.title or "", entry.url, entry.guid, entry.published, body)
+
+
+async def process_article(session, entry, rules, site_name, bias, article_pbar):
+    try:
+        body = await extract_article_body(session, entry.url, rules, site_name)
+
+        if body:
+            article = build_article(entry, site_name, bias, body)
+            article_pbar.set_postfix_str(f"📰 {article.title[:30]}...", refresh=True)
+            article_pbar.update(1)
+            return article
+        return None
+    except Exception as e:
+        print(Fore.RED + f"❌ Error processing article: {str(e)}")
+        return None
+
+async def discover_site(session, source):
+    """(entry, rules) pairs for a source, newest first: from its feeds, else from its listing page."""
+    base_url = source["url"]
+    site_name = source["name"]
+    domain = base_url.split("//")[-1].split("/")[0]
+    sections = SCRAPING_RULES.get(domain, {})
+
+    if not sections:
+        tqdm.write(f"{Fore.YELLOW}⚠️ {site_name[:15]:<15} | No scraping rules")
+        return []
+
+    discovered = await discover_from_feeds(session, FEEDS.get(domain, []))
+    if discovered is not None:
+        # Članci iz feeda koriste pravila za tekst iz prve sekcije
+        rules = next(iter(sections.values()))
+        entries, size = discovered
+        tqdm.write(f"{Fore.CYAN}📡 {site_name[:15]:<15} | {len(entries)} articles from feed ({size / 1024:.1f} KB)")
+        return [(entry, rules) for entry in entries]
+
+    html = await fetch_page(session, base_url)
+    if not html:
+        tqdm.write(f"{Fore.RED}⚠️ {site_name[:15]:<15} | Failed to fetch")
+        return []
+
+    soup = BeautifulSoup(html, 'html.parser')
+    # Entries keep only url and title, the listing tree is released right away
+    entries = discover_from_listing(soup, base_url, site_name, sections)
+    soup.decompose()
+    return entries
+
+
+async def scrape_site(session, source, position):
+    site_name = source["name"]
+    bias = source["bias"]
+
+    article_entries = await discover_site(session, source)
+    if not article_entries:
+        return []
 
     # Lokalni progress bar za ovaj sajt
     article_pbar = tqdm(
-        total=len(article_items),
+        total=len(article_entries),
         desc=f"{site_name[:15]:<15}",
         bar_format="{l_bar}{bar}| {n}/{total} [{elapsed}<{remaining}, {rate_fmt}]",
         colour='blue',
@@ -179,12 +344,12 @@ async def scrape_site(session, source, position):
     results = []
     semaphore = asyncio.Semaphore(5)
 
-    async def process_with_semaphore(item):
+    async def process_with_semaphore(entry, rules):
         async with semaphore:
-            result = await process_article(session, item, rules, base_url, site_name, bias, article_pbar)
+            result = await process_article(session, entry, rules, site_name, bias, article_pbar)
             return result
 
-    tasks = [process_with_semaphore(item) for item in article_items]
+    tasks = [process_with_semaphore(entry, rules) for entry, rules in article_entries]
     results = await asyncio.gather(*tasks)
 
     article_pbar.close()
@@ -204,7 +369,7 @@ async def save_results(results):
 
     os.makedirs("data", exist_ok=True)
     with open("data/serbian_news_articles.json", "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+        json.dump([asdict(article) for article in all_articles], f, ensure_ascii=False, indent=2)
     print(Fore.GREEN + f"\n✅ Total {len(all_articles)} articles saved to data/serbian_news_articles.json")
 
 
@@ -3,6 +3,8 @@ import re
 import json
 import time
 import asyncio
+from collections import Counter
+from dataclasses import dataclass
 from typing import Optional, Dict, Any
 
 from dotenv import load_dotenv
@@ -10,12 +12,17 @@ from openai import AsyncOpenAI
 from tqdm.asyncio import tqdm_asyncio
 from colorama import Fore, init
 
+from normalization import ENTITY_LABELS, DEFAULT_LABEL, fold, strip_case, sanitize_label
+
 # Inicijalizacija okruženja
 load_dotenv()
 init(autoreset=True)
 
+# Bez LLM poziva: samo lokalni NER, bez relacija, provere činjenica i tona (npr. za testove)
+OFFLINE = os.getenv("NLP_OFFLINE", "0") == "1"
+
 # Inicijalizacija asinhronog OpenAI klijenta
-client = AsyncOpenAI(
+client = None if OFFLINE else AsyncOpenAI(
     base_url="https://openrouter.ai/api/v1",
     api_key=os.getenv("OPENROUTER_API_KEY")
 )
@@ -25,19 +32,65 @@ DATA_PATH = "data/serbian_news_articles.json"
 OUTPUT_PATH = "data/entities_and_relations.json"
 AI_MODEL = "google/gemini-2.0-flash-001"
 
-# Učitaj vesti
-def load_articles(path: str) -> list[dict]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+# Lokalni NER pre LLM-a: llm (bez lokalnog modela) | gazetteer | transformers
+NER_BACKEND = os.getenv("NER_BACKEND", "llm")
+NER_MODEL = os.getenv("NER_MODEL", "classla/bcms-bertic-ner")
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", 16))
+# Ispod ove pouzdanosti članak ide na pun LLM prompt (entiteti + relacije)
+NER_MIN_CONFIDENCE = float(os.getenv("NER_MIN_CONFIDENCE", 0.8))
+GAZETTEER_SOURCE = os.getenv("GAZETTEER_SOURCE", "file")  # file (prethodni OUTPUT_PATH) | neo4j
 
-def build_prompt(title, text: str) -> str:
-    return f"""
-Izvuci entitete (Osoba, Organizacija, Lokacija, Vreme, Aktivnost, AktivnostDogađaj, Događaj, Grupa, Vozilo, Proizvod, Umetničko delo, Dokument, Biljka, Broj, Hrana, Piće, Institucija, Simbol, HranaPiće, Životinja, Tehnologija) 
-i deskriptivne relacije (događaji, akcije, interakcije) iz sledećeg teksta vesti, koristeći odgovarajuće tipove za Neo4j.
+# Više kratkih članaka u jednom zahtevu, da se instrukcije ne šalju za svaki posebno
+BATCH_TOKENS = int(os.getenv("NLP_BATCH_TOKENS", 8000))  # procenjeni ulazni tokeni po zahtevu, 0 isključuje
+BATCH_MAX_ARTICLES = int(os.getenv("NLP_BATCH_MAX_ARTICLES", 6))  # ograničava i dužinu odgovora
+# Istovremeni LLM zahtevi; prompt (kopija teksta članaka) postoji samo dok zahtev traje
+LLM_CONCURRENCY = int(os.getenv("NLP_CONCURRENCY", 32))
 
-Relacije moraju biti konkretne, jasno definisane između entiteta. Svaki entitet mora biti označen jednom od dozvoljenih labela.
+# Učitaj vesti
+def load_articles(path: str) -> list[dict]:
+    return list(iter_json_array(path))
 
-**Zatim dodatno:**
+def iter_json_array(path: str, chunk_size: int = 1 << 16):
+    """Elementi JSON niza jedan po jedan, bez učitavanja celog fajla u jedan string."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        while not buffer:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buffer = chunk.lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"'{path}' ne sadrži JSON niz")
+        buffer = buffer[1:]
+        while True:
+            buffer = buffer.lstrip()
+            if buffer.startswith(","):
+                buffer = buffer[1:].lstrip()
+            if buffer.startswith("]"):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+                error = None
+            except json.JSONDecodeError as e:
+                item, end, error = None, 0, e
+            rest = buffer[end:].lstrip()
+            # Element je ceo tek kad iza njega stoji , ili ]: broj presečen na granici bloka
+            # ("123" od "12345", "1." od "1.5e3") se dekodira bez greške
+            if error is None and rest[:1] in (",", "]"):
+                yield item
+                buffer = rest
+                continue
+            if error is None and rest[:1] not in ("", ".", "e", "E", "+", "-") and not rest[0].isdigit():
+                raise ValueError(f"'{path}': posle elementa niza očekivan ',' ili ']'")
+            # Element još nije ceo u baferu
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise error or ValueError(f"'{path}': JSON niz nije zatvoren")
+            buffer += chunk
+
+# Zajednički deo instrukcija za pun prompt i prompt samo za relacije
+ANALYSIS_INSTRUCTIONS = """**Zatim dodatno:**
 
 1. Sažmi najvažnije proverljive informacije iz teksta.  
    Zatim za svaku proceni njenu verodostojnost koristeći sledeće kriterijume:
@@ -52,14 +105,9 @@ Relacije moraju biti konkretne, jasno definisane između entiteta. Svaki entitet
 
 2. Opiši **ton** teksta — uzimajući u obzir rečnik, stil pisanja i emocije koje prenosi (neutralan, informativan, pristrasan, senzacionalistički, emotivan, manipulativan, pozitivan, negativan)
 
-Tekst vesti:
-{title}
-
-{text}
+"""
 
-Odgovor u tačno sledećem formatu:
-Entiteti: [entitet1:label, entitet2:label, entitet3:label]
-Relacije: [entitet1 -[:relacija]-> entitet2, entitet3 -[:relacija]-> entitet4]
+RESPONSE_FORMAT = """Relacije: [entitet1 -[:relacija]-> entitet2, entitet3 -[:relacija]-> entitet4]
 FactCheck: 
 - Tvrdnja 1: "<iz teksta>"
   Ocena: tačno / verovatno tačno / sumnjivo / nepotkrepljeno
@@ -71,15 +119,52 @@ FactCheck:
 Ton: <kratka analiza tona>
 """
 
-async def extract_entities_and_relations(title, text: str) -> str:
+def build_prompt(title, text: str) -> str:
+    return f"""
+Izvuci entitete (Osoba, Organizacija, Lokacija, Vreme, Aktivnost, AktivnostDogađaj, Događaj, Grupa, Vozilo, Proizvod, Umetničko delo, Dokument, Biljka, Broj, Hrana, Piće, Institucija, Simbol, HranaPiće, Životinja, Tehnologija) 
+i deskriptivne relacije (događaji, akcije, interakcije) iz sledećeg teksta vesti, koristeći odgovarajuće tipove za Neo4j.
+
+Relacije moraju biti konkretne, jasno definisane između entiteta. Svaki entitet mora biti označen jednom od dozvoljenih labela.
+
+{ANALYSIS_INSTRUCTIONS}Tekst vesti:
+{title}
+
+{text}
+
+Odgovor u tačno sledećem formatu:
+Entiteti: [entitet1:label, entitet2:label, entitet3:label]
+{RESPONSE_FORMAT}"""
+
+def build_relations_prompt(title, text: str, entities: str) -> str:
+    """Prompt bez NER dela, za članke čije je entitete već izdvojio lokalni model."""
+    return f"""
+Entiteti iz sledećeg teksta vesti su već izdvojeni: [{entities}]
+Izvuci deskriptivne relacije (događaji, akcije, interakcije) između tih entiteta, koristeći odgovarajuće tipove za Neo4j.
+
+Relacije moraju biti konkretne, jasno definisane između entiteta. Koristi tačno navedena imena entiteta.
+
+{ANALYSIS_INSTRUCTIONS}Tekst vesti:
+{title}
+
+{text}
+
+Odgovor u tačno sledećem formatu:
+{RESPONSE_FORMAT}"""
 
+async def complete(prompt: str) -> str:
     response = await client.chat.completions.create(
         model=AI_MODEL,
-        messages=[{"role": "user", "content": build_prompt(title, text)}],
+        messages=[{"role": "user", "content": prompt}],
         temperature=0.2
     )
     return response.choices[0].message.content.strip()
 
+async def extract_entities_and_relations(title, text: str) -> str:
+    return await complete(build_prompt(title, text))
+
+async def extract_relations(title, text: str, entities: str) -> str:
+    return await complete(build_relations_prompt(title, text, entities))
+
 def extract_matches(text: str) -> tuple[str, str]:
     entities_match = re.search(r'Entiteti: \[(.*?)\]', text)
     relations_match = re.search(r'Relacije: \[(.*]?)\]', text)
@@ -89,60 +174,364 @@ def extract_matches(text: str) -> tuple[str, str]:
 
     return entities, relations
 
-async def process_article(article: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    title = article.get("title", "")
-    text = article.get("text", "")
-    if not text:
-        return None
+# Grupni zahtevi
+ARTICLE_MARKER = "### ČLANAK {} ###"
+ARTICLE_END_MARKER = "### KRAJ ČLANKA {} ###"
 
-    try:
-        result = await extract_entities_and_relations(title, text)
-        entities, relations = extract_matches(result)
+def estimate_tokens(text: str) -> int:
+    # Gruba procena (~4 karaktera po tokenu), dovoljna za pakovanje grupa
+    return len(text) // 4 + 1
+
+def build_batch_prompt(items: list[tuple[str, str, Optional[str]]], relations_only: bool) -> str:
+    """Jedan prompt za više članaka; items su (naslov, tekst, lokalno izdvojeni entiteti)."""
+    blocks = ""
+    for number, (title, text, entities) in enumerate(items, 1):
+        known = f"Izdvojeni entiteti: [{entities}]\n" if relations_only else ""
+        blocks += f"{ARTICLE_MARKER.format(number)}\n{known}{title}\n\n{text}\n{ARTICLE_END_MARKER.format(number)}\n\n"
 
-        factcheck_match = re.search(r'(?s)FactCheck:\s*(.*?)Ton:', result)
-        tone_match = re.search(r'Ton:\s*(.*)', result)
+    if relations_only:
+        task = """Entiteti iz svakog teksta su već izdvojeni i navedeni uz tekst.
+Izvuci deskriptivne relacije (događaji, akcije, interakcije) između tih entiteta, koristeći odgovarajuće tipove za Neo4j.
 
-        factcheck = factcheck_match.group(1).strip() if factcheck_match else ""
-        tone = tone_match.group(1).strip() if tone_match else ""
+Relacije moraju biti konkretne, jasno definisane između entiteta. Koristi tačno navedena imena entiteta."""
+        response_format = RESPONSE_FORMAT
+    else:
+        labels = ", ".join(label for label in ENTITY_LABELS if label != DEFAULT_LABEL)
+        task = f"""Izvuci entitete ({labels}) 
+i deskriptivne relacije (događaji, akcije, interakcije) iz svakog teksta, koristeći odgovarajuće tipove za Neo4j.
 
+Relacije moraju biti konkretne, jasno definisane između entiteta. Svaki entitet mora biti označen jednom od dozvoljenih labela."""
+        response_format = f"Entiteti: [entitet1:label, entitet2:label, entitet3:label]\n{RESPONSE_FORMAT}"
+
+    return f"""
+Sledi {len(items)} nezavisnih tekstova vesti, svaki između oznaka "{ARTICLE_MARKER.format('n')}" i "{ARTICLE_END_MARKER.format('n')}".
+Svaki tekst analiziraj posebno, ne mešaj entitete i relacije iz različitih tekstova.
+
+{task}
+
+{ANALYSIS_INSTRUCTIONS}Tekstovi vesti:
+
+{blocks}Za svaki članak redom, odgovor počni oznakom "{ARTICLE_MARKER.format('n')}" (n je broj članka), a zatim u tačno sledećem formatu:
+{response_format}"""
+
+def split_batch_response(response: str, count: int, relations_only: bool) -> dict[int, str]:
+    """Odgovor po rednom broju članka; delovi koji nisu u očekivanom formatu se izostavljaju."""
+    required = ("Relacije:", "Ton:") if relations_only else ("Entiteti:", "Relacije:", "Ton:")
+    parts = re.split(r"^\W*[ČC]LANAK\s+(\d+)\W*$", response, flags=re.MULTILINE | re.IGNORECASE)
+    sections = {}
+    for number, body in zip(parts[1::2], parts[2::2]):
+        number, body = int(number), body.strip()
+        if 1 <= number <= count and number not in sections and all(key in body for key in required):
+            sections[number] = body
+    return sections
+
+def plan_batches(articles: list[dict], entities: list[Optional[str]],
+                 budget: int = BATCH_TOKENS, max_articles: int = BATCH_MAX_ARTICLES) -> list[list[int]]:
+    """Deli članke (po indeksima) u grupe čiji procenjeni prompt staje u budžet tokena.
+
+    Grupa je homogena: ili svi članci traže entitete, ili su svima entiteti izdvojeni lokalno.
+    Članci koji sami zauzimaju više od pola budžeta idu pojedinačno.
+    """
+    batches = []
+    open_batches = {}  # relations_only -> (indeksi, procenjeni tokeni)
+    overhead = {kind: estimate_tokens(build_batch_prompt([], kind)) for kind in (False, True)}
+    for i, (article, known) in enumerate(zip(articles, entities)):
+        kind = known is not None
+        room = budget - overhead[kind]
+        tokens = estimate_tokens(f"{article.get('title', '')}{article.get('text', '')}{known or ''}") + 20
+        if budget <= 0 or max_articles <= 1 or not article.get("text") or tokens > room / 2:
+            batches.append([i])
+            continue
+        indices, used = open_batches.get(kind, ([], 0))
+        if indices and (used + tokens > room or len(indices) >= max_articles):
+            batches.append(indices)
+            indices, used = [], 0
+        open_batches[kind] = (indices + [i], used + tokens)
+    batches.extend(indices for indices, _ in open_batches.values())
+    return batches
+
+# Lokalni NER
+# ([(ime, labela)], pouzdanost u [0, 1]) po članku
+LocalEntities = tuple[list[tuple[str, str]], float]
+
+def proper_noun_coverage(text: str, spans: list[tuple[int, int]]) -> float:
+    # Udeo reči sa velikim početnim slovom (van početka rečenice) koje pokrivaju pronađeni entiteti
+    if not spans:
+        # Ništa nije pronađeno (npr. prazan rečnik): imena na početku rečenice se ne vide, neka radi LLM
+        return 0.0
+    candidates = covered = 0
+    previous_end = 0
+    for match in re.finditer(r"[^\W\d_][\w-]*", text):
+        gap = text[previous_end:match.start()]
+        sentence_start = previous_end == 0 or any(c in ".!?:\n" for c in gap)
+        previous_end = match.end()
+        if sentence_start or not match.group()[0].isupper():
+            continue
+        candidates += 1
+        covered += any(start <= match.start() < end for start, end in spans)
+    return covered / candidates if candidates else 1.0
+
+class EntityExtractor:
+    """Lokalni NER za ceo skup članaka odjednom (batch)."""
+
+    def extract(self, articles: list[dict]) -> list[LocalEntities]:
+        raise NotImplementedError
+
+class GazetteerExtractor(EntityExtractor):
+    """Prepoznaje entitete koji već postoje u grafu ili u prethodnim rezultatima, i u padežima."""
+
+    # Zavise od konteksta članka, nemaju smisla u rečniku
+    SKIP_LABELS = {"Vreme", "Broj"}
+    MIN_NAME_LENGTH = 3
+
+    def __init__(self, entities: dict[str, str]):
+        self.index = {}
+        self.max_tokens = 1
+        for name, label in entities.items():
+            key = tuple(token for _, _, token in self.tokens(name))
+            if key and len(name) >= self.MIN_NAME_LENGTH and label in ENTITY_LABELS and label not in self.SKIP_LABELS:
+                self.index[key] = (name, label)
+                self.max_tokens = max(self.max_tokens, len(key))
+
+    @staticmethod
+    def tokens(text: str) -> list[tuple[int, int, str]]:
+        return [(m.start(), m.end(), strip_case(fold(m.group()))) for m in re.finditer(r"[^\W_]+", text)]
+
+    @classmethod
+    def from_file(cls, path: str = OUTPUT_PATH) -> "GazetteerExtractor":
+        labels = {}
+        try:
+            for article in load_articles(path):
+                for entity in (article.get("entities") or "").split(", "):
+                    if ":" in entity:
+                        name, label = map(str.strip, entity.split(":", 1))
+                        labels.setdefault(name, Counter())[label] += 1
+        except FileNotFoundError:
+            print(Fore.YELLOW + f"⚠️ Nema '{path}', rečnik entiteta je prazan")
+        # Najčešća labela po imenu
+        return cls({name: counts.most_common(1)[0][0] for name, counts in labels.items()})
+
+    @classmethod
+    def from_neo4j(cls, driver=None) -> "GazetteerExtractor":
+        # Prosleđen driver (npr. fake_neo4j) ostaje otvoren, sopstveni se zatvara
+        owned = driver is None
+        if owned:
+            from neo4j import GraphDatabase
+
+            driver = GraphDatabase.driver(os.getenv("NEO4J_URI"), auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")))
+        try:
+            records, _, _ = driver.execute_query("""
+                MATCH (e)
+                WHERE NOT e:Article AND e.name IS NOT NULL
+                RETURN e.name AS name, labels(e)[0] AS label
+            """)
+        finally:
+            if owned:
+                driver.close()
+        # populate_graph piše sanitizovane labele ("Umetničkodelo"), rečnik radi sa ENTITY_LABELS
+        labels = {sanitize_label(label): label for label in ENTITY_LABELS}
+        return cls({record["name"]: labels.get(record["label"], record["label"]) for record in records})
+
+    def extract(self, articles: list[dict]) -> list[LocalEntities]:
+        results = []
+        for article in articles:
+            text = f"{article.get('title', '')}\n{article.get('text', '')}"
+            tokens = self.tokens(text)
+            found, spans = {}, []
+            i = 0
+            while i < len(tokens):
+                # Najduže poklapanje od trenutne reči
+                for size in range(min(self.max_tokens, len(tokens) - i), 0, -1):
+                    hit = self.index.get(tuple(token for _, _, token in tokens[i:i + size]))
+                    if hit:
+                        found.setdefault(hit[0], hit[1])
+                        spans.append((tokens[i][0], tokens[i + size - 1][1]))
+                        i += size
+                        break
+                else:
+                    i += 1
+            results.append((list(found.items()), proper_noun_coverage(text, spans)))
+        return results
+
+class TransformersExtractor(EntityExtractor):
+    """CPU NER model (podrazumevano BERTić za BCMS jezike) preko transformers pipeline-a."""
+
+    LABELS = {"PER": "Osoba", "ORG": "Organizacija", "LOC": "Lokacija"}
+
+    def __init__(self, model: str = NER_MODEL, batch_size: int = NER_BATCH_SIZE):
+        from transformers import pipeline
+
+        # stride: dugi članci se dele na preklapajuće prozore umesto da se seku na 512 tokena
+        self.pipeline = pipeline("token-classification", model=model, aggregation_strategy="simple",
+                                 device=-1, stride=64)
+        self.batch_size = batch_size
+
+    def extract(self, articles: list[dict]) -> list[LocalEntities]:
+        texts = [f"{article.get('title', '')}\n{article.get('text', '')}" for article in articles]
+        results = []
+        for predictions in self.pipeline(texts, batch_size=self.batch_size):
+            found, scores = {}, []
+            for prediction in predictions:
+                label = self.LABELS.get(prediction["entity_group"])
+                name = prediction["word"].strip()
+                if label and len(name) > 1:
+                    found.setdefault(name, label)
+                    scores.append(float(prediction["score"]))
+            # Bez ijednog entiteta nema na osnovu čega da verujemo modelu
+            results.append((list(found.items()), sum(scores) / len(scores) if scores else 0.0))
+        return results
+
+def get_extractor() -> Optional[EntityExtractor]:
+    if NER_BACKEND == "gazetteer":
+        return GazetteerExtractor.from_neo4j() if GAZETTEER_SOURCE == "neo4j" else GazetteerExtractor.from_file()
+    if NER_BACKEND == "transformers":
+        return TransformersExtractor()
+    return None
+
+def local_entities(local: Optional[LocalEntities]) -> Optional[str]:
+    """Lokalni entiteti za prompt, ili None kad članak ide na pun LLM prompt."""
+    # Dovoljno pouzdan lokalni NER: LLM radi samo relacije, proveru činjenica i ton
+    if local is None or not (OFFLINE or local[1] >= NER_MIN_CONFIDENCE):
+        return None
+    return ", ".join(f"{name}:{label}" for name, label in local[0])
+
+@dataclass(slots=True)
+class Analysis:
+    """Parsiran LLM odgovor za jedan članak, bez teksta članka i sirovog odgovora."""
+    source: Optional[str]
+    bias: Optional[str]
+    title: Optional[str]
+    url: Optional[str]
+    entities: str
+    relations: str
+    fact_check: str
+    tone: str
+    ner_source: str
+
+    def to_dict(self, text: str) -> Dict[str, Any]:
+        """Zapis u formatu OUTPUT_PATH (čita ga populate_graph); tekst dolazi iz ulaznog članka."""
         return {
-            "article_source": article.get("source"),
-            "article_bias": article.get("bias"),
-            "article_title": article.get("title"),
-            "article_url": article.get("url"),
+            "article_source": self.source,
+            "article_bias": self.bias,
+            "article_title": self.title,
+            "article_url": self.url,
             "article_text": text,
-            "entities_and_relations": result,
-            "entities": entities,
-            "entity_count": len(entities.split(", ")) if entities else 0,
-            "relations": relations,
-            "relations_count": len(relations.split(", ")) if relations else 0,
-            "fact_check": factcheck,
-            "tone_analysis": tone
+            "entities": self.entities,
+            "entity_count": len(self.entities.split(", ")) if self.entities else 0,
+            "relations": self.relations,
+            "relations_count": len(self.relations.split(", ")) if self.relations else 0,
+            "fact_check": self.fact_check,
+            "tone_analysis": self.tone,
+            "ner_source": self.ner_source
         }
 
+def build_record(article: Dict[str, Any], result: str, entities: Optional[str]) -> Analysis:
+    ner_source = "llm" if entities is None else "local"
+    if entities is None:
+        entities, relations = extract_matches(result)
+    else:
+        _, relations = extract_matches(result)
+
+    factcheck_match = re.search(r'(?s)FactCheck:\s*(.*?)Ton:', result)
+    tone_match = re.search(r'Ton:\s*(.*)', result)
+
+    factcheck = factcheck_match.group(1).strip() if factcheck_match else ""
+    tone = tone_match.group(1).strip() if tone_match else ""
+
+    return Analysis(article.get("source"), article.get("bias"), article.get("title"), article.get("url"),
+                    entities, relations, factcheck, tone, ner_source)
+
+async def process_article(article: Dict[str, Any], local: Optional[LocalEntities] = None) -> Optional[Analysis]:
+    title = article.get("title", "")
+    text = article.get("text", "")
+    if not text:
+        return None
+
+    entities = local_entities(local)
+    try:
+        if entities is not None:
+            result = "" if OFFLINE else await extract_relations(title, text, entities)
+        else:
+            result = await extract_entities_and_relations(title, text)
+        return build_record(article, result, entities)
 
     except Exception as e:
         print(Fore.RED + f"[✖] Greška za članak '{article.get('title', 'N/A')}': {e}")
         return None
 
+async def process_batch(articles: list[Dict[str, Any]], local_results: list[Optional[LocalEntities]]) -> list[Optional[Analysis]]:
+    """Jedan LLM zahtev za grupu članaka; članci bez ispravnog dela odgovora idu pojedinačno."""
+    if len(articles) == 1:
+        return [await process_article(articles[0], local_results[0])]
+
+    entities = [local_entities(local) for local in local_results]
+    relations_only = entities[0] is not None
+    items = [(article.get("title", ""), article.get("text", ""), known) for article, known in zip(articles, entities)]
+    try:
+        sections = split_batch_response(await complete(build_batch_prompt(items, relations_only)),
+                                        len(articles), relations_only)
+    except Exception as e:
+        print(Fore.YELLOW + f"⚠️ Grupni zahtev za {len(articles)} članaka nije uspeo: {e}")
+        sections = {}
+
+    failed = [i for i in range(len(articles)) if i + 1 not in sections]
+    if failed:
+        print(Fore.YELLOW + f"⚠️ {len(failed)}/{len(articles)} članaka iz grupe bez ispravnog odgovora, šaljem pojedinačno")
+    retried = dict(zip(failed, await asyncio.gather(*(process_article(articles[i], local_results[i]) for i in failed))))
+
+    return [retried[i] if i in retried else build_record(articles[i], sections[i + 1], entities[i])
+            for i in range(len(articles))]
+
 async def process_articles():
     articles = load_articles(DATA_PATH)
 
+    extractor = get_extractor()
+    if OFFLINE and extractor is None:
+        print(Fore.RED + "NLP_OFFLINE=1 zahteva lokalni NER (NER_BACKEND=gazetteer ili transformers)")
+        return
+
+    local_results = [None] * len(articles)
+    if extractor:
+        print(Fore.CYAN + f"🏷  Lokalni NER ({NER_BACKEND}) za {len(articles)} članaka...")
+        local_results = extractor.extract(articles)
+        confident = sum(1 for _, confidence in local_results if confidence >= NER_MIN_CONFIDENCE)
+        print(Fore.CYAN + f"   {confident}/{len(articles)} članaka šalje LLM-u samo relacije, ostali pun prompt\n")
+
+    # Bez LLM-a nema šta da se grupiše
+    entities = [local_entities(local) for local in local_results]
+    batches = plan_batches(articles, entities, budget=0 if OFFLINE else BATCH_TOKENS)
+    grouped = sum(len(batch) - 1 for batch in batches)
+    if grouped:
+        saved = grouped * estimate_tokens(ANALYSIS_INSTRUCTIONS + RESPONSE_FORMAT)
+        print(Fore.CYAN + f"📦 {len(articles)} članaka u {len(batches)} LLM zahteva (~{saved} ulaznih tokena manje)\n")
+
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+    async def process_with_semaphore(batch):
+        async with semaphore:
+            return await process_batch([articles[i] for i in batch], [local_results[i] for i in batch])
+
     print(Fore.CYAN + f"🔎 Analiza {len(articles)} članaka...\n")
-    results = await tqdm_asyncio.gather(
-        *(process_article(article) for article in articles),
+    batch_results = await tqdm_asyncio.gather(
+        *(process_with_semaphore(batch) for batch in batches),
         desc="🔍 Obrada vesti",
-        total=len(articles),
+        total=len(batches),
         colour='blue',
         leave=False,
-        unit="article",
+        unit="request",
         unit_scale=True,
         smoothing=0.1,
         miniters=1,
         bar_format="{l_bar}{bar}| {n}/{total} [{elapsed}<{remaining}, {rate_fmt}]",
     )
 
-    cleaned_results = [r for r in results if r]
+    # Redosled kao u ulaznom fajlu
+    results = [None] * len(articles)
+    for batch, batch_result in zip(batches, batch_results):
+        for i, result in zip(batch, batch_result):
+            results[i] = result
+
+    cleaned_results = [result.to_dict(article.get("text", "")) for article, result in zip(articles, results) if result]
     with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
         json.dump(cleaned_results, f, ensure_ascii=False, indent=4)
 
@@ -150,6 +539,6 @@ async def process_articles():
 
 if __name__ == "__main__":
     start = time.time()
-    print(Fore.MAGENTA + f"\nKoristim {AI_MODEL} model za analizu!\n")
+    print(Fore.MAGENTA + f"\nKoristim {'samo lokalni NER' if OFFLINE else AI_MODEL} model za analizu!\n")
     asyncio.run(process_articles())
     print(Fore.YELLOW + f"\n⏱ Ukupno vreme: {time.time() - start:.2f} sekundi")
\ No newline at end of file
@@ -0,0 +1,138 @@
+import re
+import json
+from collections import Counter
+
+VOCABULARY_PATH = "relation_vocabulary.json"
+
+ENTITY_LABELS = [
+    "Osoba", "Organizacija", "Lokacija", "Vreme", "Aktivnost",
+    "AktivnostDogađaj", "Događaj", "Grupa", "Vozilo", "Proizvod",
+    "Umetničko delo", "Dokument", "Biljka", "Broj", "Hrana", "Piće",
+    "Institucija", "Simbol", "HranaPiće", "Životinja", "Tehnologija", "Entity"
+]
+DEFAULT_LABEL = "Entity"
+
+# Auxiliary verbs, reflexive "se", conjunctions and prepositions carry no relation meaning
+STOPWORDS = {
+    "je", "su", "sam", "si", "smo", "ste", "bio", "bila", "bilo", "bili", "bile", "biti", "ce", "cu", "ces",
+    "cemo", "cete", "se", "sa", "s", "u", "na", "za", "od", "do", "o", "iz", "po", "prema", "kod", "sebi",
+    "da", "i", "ili", "a", "koji", "koja", "koje", "kao", "has", "is", "was", "the", "of", "to", "with"
+}
+
+# Common Serbian verb/noun endings, longest first
+SUFFIXES = sorted([
+    "avajuci", "ivajuci", "ujuci", "ljuje", "ljuju", "ovao", "ovala", "ovalo", "ovali", "ovati", "ivao", "ivala",
+    "ivali", "ivati", "avao", "avala", "avali", "avati", "uje", "uju", "ije", "iju", "ao", "ala", "alo", "ali", "ale",
+    "ati", "io", "ila", "ilo", "ili", "ile", "iti", "eo", "ela", "eli", "eti", "om", "ima", "ama", "ov", "ova",
+    "i", "a", "e", "o", "u"
+], key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+
+# Shorter vocabulary stems only match when the rest of the word is an ending: "rek" is "rekao"/"rekla",
+# not "rekonstruisao"
+MIN_PREFIX_LENGTH = 5
+ENDINGS = set(SUFFIXES) | {"", "la", "lo", "li", "le", "ti"}
+
+# Noun case endings only, for matching inflected names ("Srbije", "Vučiću") to their base form
+CASE_ENDINGS = ["ima", "ama", "em", "om", "a", "e", "i", "o", "u"]
+MIN_NAME_STEM_LENGTH = 2  # "Ana"/"Anom"/"Ani" -> "an"
+
+FOLD = str.maketrans({"š": "s", "đ": "dj", "č": "c", "ć": "c", "ž": "z"})
+
+
+def fold(text):
+    """Lowercase and strip Serbian diacritics, the LLM is not consistent about them."""
+    return text.lower().translate(FOLD)
+
+
+def stem(word):
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def strip_case(word):
+    for ending in CASE_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_NAME_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def sanitize_label(label):
+    safe_label = ''.join(c for c in label if c.isalnum() or c == '_')
+    return f"Label_{safe_label}" if safe_label and safe_label[0].isdigit() else safe_label
+
+
+class Normalizer:
+    """Maps free-text LLM relations and labels onto a bounded vocabulary.
+
+    Relation phrases are folded, stripped of auxiliaries/prepositions and matched
+    against relation_vocabulary.json by longest stem prefix; stems shorter than
+    MIN_PREFIX_LENGTH letters also need the rest of the word to be one of ENDINGS.
+    Anything unmatched becomes the default type. Labels are clamped to
+    ENTITY_LABELS. Counts of what was collapsed are kept for report().
+    """
+
+    def __init__(self, types, default):
+        self.default = default
+        self.prefixes = sorted(
+            ((fold(prefix), rel_type) for rel_type, prefixes in types.items() for prefix in prefixes),
+            key=lambda item: len(item[0]), reverse=True
+        )
+        self.labels = {fold(sanitize_label(label)): sanitize_label(label) for label in ENTITY_LABELS}
+        self.relation_cache = {}
+
+        self.raw_types = set()
+        self.type_counts = Counter()
+        self.unmapped = Counter()
+        self.clamped_labels = Counter()
+
+    @classmethod
+    def from_file(cls, path=VOCABULARY_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        return cls(vocabulary["types"], vocabulary["default"])
+
+    def relation_type(self, phrase):
+        """Canonical relationship type for a raw relation phrase such as 'je izjavio'."""
+        raw_type = ''.join(c for c in phrase.upper().replace(" ", "_") if c.isalnum() or c == '_')
+        self.raw_types.add(raw_type)
+
+        rel_type = self.relation_cache.get(raw_type)
+        if rel_type is None:
+            rel_type = self._match(phrase)
+            self.relation_cache[raw_type] = rel_type
+        if rel_type == self.default:
+            words = [w for w in re.findall(r"[^\W_]+", fold(phrase)) if w not in STOPWORDS]
+            self.unmapped[" ".join(stem(w) for w in words) or phrase] += 1
+
+        self.type_counts[rel_type] += 1
+        return rel_type
+
+    def _match(self, phrase):
+        for word in re.findall(r"[^\W_]+", fold(phrase)):
+            if word in STOPWORDS:
+                continue
+            for prefix, rel_type in self.prefixes:
+                if word.startswith(prefix) and (len(prefix) >= MIN_PREFIX_LENGTH or word[len(prefix):] in ENDINGS):
+                    return rel_type
+        return self.default
+
+    def label(self, label):
+        """One of ENTITY_LABELS (sanitized for Cypher), or DEFAULT_LABEL."""
+        safe_label = self.labels.get(fold(sanitize_label(label)))
+        if safe_label is None:
+            self.clamped_labels[label] += 1
+            return DEFAULT_LABEL
+        return safe_label
+
+    def report(self, top=10):
+        lines = [f"{len(self.raw_types)} raw relation types collapsed into {len(self.type_counts)}"]
+        if self.unmapped:
+            lines.append(f"{sum(self.unmapped.values())} relations unmapped -> {self.default}, most common stems: "
+                         + ", ".join(f"{stem_} ({count})" for stem_, count in self.unmapped.most_common(top)))
+        if self.clamped_labels:
+            lines.append(f"{sum(self.clamped_labels.values())} entities with unknown labels -> {DEFAULT_LABEL}: "
+                         + ", ".join(f"{label} ({count})" for label, count in self.clamped_labels.most_common(top)))
+        return lines
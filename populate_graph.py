@@ -1,9 +1,21 @@
 import os
+import re
 import json
+import time
+import heapq
+import random
+import argparse
+import threading
+from array import array
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
+from neo4j.exceptions import TransientError
 from tqdm import tqdm
 from colorama import Fore
+from normalization import Normalizer, ENTITY_LABELS, sanitize_label
 # from rapidfuzz import fuzz  # Removed: no fuzzy matching
 
 load_dotenv()
@@ -12,23 +24,36 @@ URI = os.getenv("NEO4J_URI")
 USER = os.getenv("NEO4J_USER")
 PASSWORD = os.getenv("NEO4J_PASSWORD")
 
+WRITE_BATCH_SIZE = 1000
+PAGERANK_DAMPING = 0.85
+PAGERANK_MAX_ITERATIONS = 100
+PAGERANK_TOLERANCE = 1e-6
+GDS_GRAPH_NAME = "entity_importance"
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 1))
+# Deadlocks and lock timeouts come back as TransientError; the driver already retries inside
+# execute_write, these retries cover batches that still fail after that
+WRITE_RETRIES = 5
+RETRY_BACKOFF = 0.2  # seconds, doubled on every retry
+
 
 class ArticleGraph:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri, user, password, driver=None):
+        # driver can be passed in to reuse a pool or to load into fake_neo4j
+        self.driver = driver or GraphDatabase.driver(uri, auth=(user, password))
         # self.entity_mapping = {}  # Removed: not using normalization
         # self.entity_labels = {}   # Removed: not using label tracking
         # self.label_usage_count = {}  # Removed
         # self.label_variants = {}     # Removed
         # self.all_labels = []         # Removed
         self.relationship_types = set()
+        self.normalizer = Normalizer.from_file()
 
     def close(self):
         self.driver.close()
 
     def sanitize_label(self, label):
-        safe_label = ''.join(c for c in label if c.isalnum() or c == '_')
-        return f"Label_{safe_label}" if safe_label and safe_label[0].isdigit() else safe_label
+        return sanitize_label(label)
 
     def process_relationship_string(self, relation_str):
         parts = relation_str.strip().split("-[:")
@@ -54,7 +79,10 @@ class ArticleGraph:
         """
         return tx.run(query, from_name=from_entity, to_name=to_entity, article_title=article_title).single()
 
-    def process_all_articles(self, articles):
+    def process_all_articles(self, articles, workers=1):
+        if workers > 1:
+            return self.process_all_articles_parallel(articles, workers)
+
         print(Fore.CYAN + "🚀 Starting article processing...\n")
 
         # Removed first pass for collecting entity labels and variants
@@ -88,6 +116,13 @@ class ArticleGraph:
 
         # Replace the progress bar with a completion message
         print(f"\r{Fore.GREEN}✔ All {len(articles)} articles processed successfully{' ' * 20}")
+        for line in self.normalizer.report():
+            print(Fore.CYAN + f"🔤 {line}")
+
+    def article_urls(self):
+        with self.driver.session() as session:
+            return session.execute_read(
+                lambda tx: [record["url"] for record in tx.run("MATCH (a:Article) RETURN a.url AS url")])
 
     def create_article_with_entities_and_relations(self, article_data):
         with self.driver.session() as session:
@@ -118,7 +153,7 @@ class ArticleGraph:
                 if ":" not in entity:
                     continue
                 name, label = map(str.strip, entity.split(":", 1))
-                safe_label = self.sanitize_label(label)
+                safe_label = self.normalizer.label(label)
                 entity_labels_map[name] = safe_label
 
                 tx.run(f"""
@@ -142,7 +177,8 @@ class ArticleGraph:
                 if None in [from_entity, rel_type, to_entity, direction]:
                     continue
 
-                rel_type_clean = ''.join(c for c in rel_type.upper().replace(" ", "_") if c.isalnum() or c == '_')
+                # Bounded vocabulary instead of one relationship type per LLM phrasing
+                rel_type_clean = self.normalizer.relation_type(rel_type)
                 self.relationship_types.add(rel_type_clean)
 
                 # Determine label for from/to entities if known from entities section
@@ -159,10 +195,456 @@ class ArticleGraph:
                         MATCH (from:{from_label} {{name: $from_name}})
                         MATCH (to:{to_label} {{name: $to_name}})
                         MERGE (from)-[r:{rel_type_clean} {{article: $article_title}}]->(to)
-                    """, from_name=from_entity, to_name=to_entity, article_title=article["article_title"])
+                        ON CREATE SET r.raw = $raw
+                    """, from_name=from_entity, to_name=to_entity, article_title=article["article_title"], raw=rel_type)
                 except Exception as e:
                     print(f"Failed to create relationship {relation}: {e}")
 
+    # Parallel ingest
+    def process_all_articles_parallel(self, articles, workers):
+        """Same graph as process_all_articles, written by `workers` sessions at once.
+
+        All nodes are created first in deduplicated UNWIND batches, so no two batches
+        MERGE the same node. Relationships are then written in rounds in which no two
+        workers touch the same node (see _schedule_relationships), so workers never
+        queue on or deadlock over each other's node locks. Batches that
+        fail with a TransientError are retried with backoff, and the written graph is
+        checked against the plan at the end.
+        """
+        print(Fore.CYAN + f"🚀 Starting parallel article processing ({workers} workers)...\n")
+        start = time.perf_counter()
+        plan = self._plan_ingest(articles)
+
+        node_jobs = [(self._article_rows_query(), rows) for rows in self._batches(list(plan["articles"].values()))]
+        for label, names in plan["entities"].items():
+            node_jobs += [(self._entity_rows_query(label), rows) for rows in self._batches(sorted(names))]
+        # Node batches never overlap, any split works
+        stats = self._run_jobs([[node_jobs[i::workers] for i in range(workers)]], "Nodes")
+        stats += self._run_jobs(self._schedule_relationships(plan, workers), "Relationships")
+
+        elapsed = time.perf_counter() - start
+        print(f"\r{Fore.GREEN}✔ All {len(articles)} articles processed in {elapsed:.2f}s{' ' * 20}")
+        if stats["retries"]:
+            print(Fore.YELLOW + f"🔁 {stats['retries']} transaction retries after transient errors")
+        for line in self.normalizer.report():
+            print(Fore.CYAN + f"🔤 {line}")
+        return self.consistency_report(plan, stats, workers)
+
+    def _plan_ingest(self, articles):
+        """Deduplicated rows for the whole batch, grouped by label/type since those can't be parameters."""
+        plan = {
+            "articles": {},  # title -> row
+            "entities": defaultdict(set),  # label -> names
+            "mentions": defaultdict(set),  # label -> (title, name)
+            "relations": defaultdict(dict)  # (from label, type, to label) -> {(from, to, title): raw}
+        }
+        for article in articles:
+            title = article["article_title"]
+            plan["articles"][title] = {
+                "title": title,
+                "url": article["article_url"],
+                "source": article["article_source"],
+                "bias": article["article_bias"],
+                "text": article["article_text"],
+                "fact_check": article.get("fact_check", ""),
+                "tone": article.get("tone_analysis", "")
+            }
+
+            entity_labels_map = {}
+            for entity in (article.get("entities") or "").split(", "):
+                if ":" not in entity:
+                    continue
+                name, label = map(str.strip, entity.split(":", 1))
+                safe_label = self.normalizer.label(label)
+                entity_labels_map[name] = safe_label
+                plan["entities"][safe_label].add(name)
+                plan["mentions"][safe_label].add((title, name))
+
+            for relation in (article.get("relations") or "").split(", "):
+                relation = relation.strip()
+                if not relation:
+                    continue
+                from_entity, rel_type, to_entity, direction = self.process_relationship_string(relation)
+                if None in [from_entity, rel_type, to_entity, direction]:
+                    continue
+
+                rel_type_clean = self.normalizer.relation_type(rel_type)
+                self.relationship_types.add(rel_type_clean)
+                from_label = entity_labels_map.get(from_entity, "Entity")
+                to_label = entity_labels_map.get(to_entity, "Entity")
+                plan["entities"][from_label].add(from_entity)
+                plan["entities"][to_label].add(to_entity)
+                # ON CREATE SET r.raw: the first phrasing wins, as in the sequential path
+                plan["relations"][(from_label, rel_type_clean, to_label)].setdefault(
+                    (from_entity, to_entity, title), rel_type)
+        return plan
+
+    def _schedule_relationships(self, plan, workers):
+        """Rounds of per-worker (query, rows) batches in which no node is written by two workers.
+
+        Every relationship MERGE locks both of its endpoints, so workers writing
+        relationships of the same node wait on each other, and deadlock when two
+        batches take shared nodes in opposite order. Nodes are split into
+        2 * workers partitions of about equal degree. In each round every worker
+        writes the relationships between one pair of partitions, a different pair
+        per round (round-robin), then the relationships inside single partitions.
+        A hub ends up alone in its partition and is only ever locked by one worker.
+        """
+        # (start node, end node, group, row) for every relationship to write
+        edges = []
+        for label, pairs in plan["mentions"].items():
+            for title, name in pairs:
+                edges.append((("Article", title), (label, name), ("MENTIONS", label),
+                              {"title": title, "name": name}))
+        for group, rows in plan["relations"].items():
+            from_label, _, to_label = group
+            for (from_name, to_name, title), raw in rows.items():
+                edges.append(((from_label, from_name), (to_label, to_name), group,
+                              {"from_name": from_name, "to_name": to_name, "article_title": title, "raw": raw}))
+
+        degree = Counter()
+        for start, end, _, _ in edges:
+            degree[start] += 1
+            degree[end] += 1
+        # Busiest nodes first onto the lightest partition
+        partition_count = 2 * workers
+        loads = [(0, p) for p in range(partition_count)]
+        partition = {}
+        for node in sorted(degree, key=lambda n: (-degree[n], n)):
+            load, p = heapq.heappop(loads)
+            partition[node] = p
+            heapq.heappush(loads, (load + degree[node], p))
+
+        cells = defaultdict(list)
+        for start, end, group, row in edges:
+            cells[tuple(sorted((partition[start], partition[end])))].append((group, (start, end), row))
+
+        # Circle method: partition_count - 1 rounds, each pairing every partition with another once
+        order = list(range(partition_count))
+        pairings = []
+        for _ in range(partition_count - 1):
+            pairings.append([(order[i], order[-1 - i]) for i in range(workers)])
+            order = [order[0], order[-1]] + order[1:-1]
+        pairings.append([(p, p) for p in range(partition_count)])
+
+        rounds = []
+        for pairs in pairings:
+            shards = [[] for _ in range(workers)]
+            for i, pair in enumerate(pairs):
+                shards[i % workers] += cells.get(tuple(sorted(pair)), [])
+            rounds.append([self._relationship_jobs(rows) for rows in shards])
+        return rounds
+
+    def _relationship_jobs(self, keyed_rows):
+        groups = defaultdict(list)
+        # Same lock order in every batch: by start node, then end node
+        for group, lock_key, row in sorted(keyed_rows, key=lambda keyed: keyed[1]):
+            groups[group].append(row)
+        jobs = []
+        for group, rows in groups.items():
+            query = (self._mention_rows_query(group[1]) if group[0] == "MENTIONS"
+                     else self._relation_rows_query(*group))
+            jobs += [(query, batch) for batch in self._batches(rows)]
+        return jobs
+
+    def _run_jobs(self, rounds, desc):
+        """Runs every shard's (query, rows) batches in its own thread and session, one round at a time."""
+        stats = Counter()
+        lock = threading.Lock()
+        with tqdm(total=sum(len(jobs) for shards in rounds for jobs in shards), desc=desc, colour='blue',
+                  leave=False, unit="batch") as pbar:
+
+            def run_shard(jobs):
+                shard_stats = Counter()
+                with self.driver.session() as session:
+                    for query, rows in jobs:
+                        self._write_with_retry(session, query, rows, shard_stats)
+                        pbar.update(1)
+                with lock:
+                    stats.update(shard_stats)
+
+            with ThreadPoolExecutor(max_workers=max(len(shards) for shards in rounds)) as executor:
+                for shards in rounds:
+                    for future in [executor.submit(run_shard, jobs) for jobs in shards if jobs]:
+                        future.result()
+        return stats
+
+    def _write_with_retry(self, session, query, rows, stats):
+        attempts = 0
+
+        def write(tx):
+            # execute_write calls this again on every retry it does by itself
+            nonlocal attempts
+            attempts += 1
+            tx.run(query, rows=rows).consume()
+
+        for retry in range(WRITE_RETRIES + 1):
+            try:
+                session.execute_write(write)
+                stats["retries"] += max(attempts, retry + 1) - 1
+                return
+            except TransientError as e:
+                if retry == WRITE_RETRIES:
+                    print(Fore.RED + f"✖ Batch of {len(rows)} rows failed after {WRITE_RETRIES} retries: {e}")
+                    stats["retries"] += max(attempts, retry + 1) - 1
+                    stats["failed_batches"] += 1
+                    return
+                # Jitter so the workers that deadlocked with each other don't collide again
+                time.sleep(RETRY_BACKOFF * 2 ** retry * (1 + random.random()))
+
+    @staticmethod
+    def _batches(rows):
+        return [rows[i:i + WRITE_BATCH_SIZE] for i in range(0, len(rows), WRITE_BATCH_SIZE)]
+
+    @staticmethod
+    def _article_rows_query():
+        return """
+            UNWIND $rows AS row
+            MERGE (a:Article {title: row.title})
+            SET a.url = row.url,
+                a.source = row.source,
+                a.bias = row.bias,
+                a.text = row.text,
+                a.fact_check = row.fact_check,
+                a.tone = row.tone
+        """
+
+    @staticmethod
+    def _entity_rows_query(label):
+        return f"""
+            UNWIND $rows AS name
+            MERGE (e:{label} {{name: name}})
+        """
+
+    @staticmethod
+    def _mention_rows_query(label):
+        return f"""
+            UNWIND $rows AS row
+            MATCH (a:Article {{title: row.title}})
+            MATCH (e:{label} {{name: row.name}})
+            MERGE (a)-[:MENTIONS]->(e)
+        """
+
+    @staticmethod
+    def _relation_rows_query(from_label, rel_type, to_label):
+        return f"""
+            UNWIND $rows AS row
+            MATCH (from:{from_label} {{name: row.from_name}})
+            MATCH (to:{to_label} {{name: row.to_name}})
+            MERGE (from)-[r:{rel_type} {{article: row.article_title}}]->(to)
+            ON CREATE SET r.raw = row.raw
+        """
+
+    def consistency_report(self, plan, stats, workers=1):
+        """Counts what the plan should have written and what the database actually has."""
+        checks = {"articles": [(
+            """
+                UNWIND $rows AS title
+                MATCH (a:Article {title: title})
+                RETURN count(a) AS found
+            """, list(plan["articles"]))]}
+        checks["entities"] = [(
+            f"""
+                UNWIND $rows AS name
+                MATCH (e:{label} {{name: name}})
+                RETURN count(e) AS found
+            """, sorted(names)) for label, names in plan["entities"].items()]
+        checks["mentions"] = [(
+            f"""
+                UNWIND $rows AS row
+                MATCH (a:Article {{title: row.title}})-[r:MENTIONS]->(e:{label} {{name: row.name}})
+                RETURN count(r) AS found
+            """, [{"title": title, "name": name} for title, name in pairs]) for label, pairs in plan["mentions"].items()]
+        checks["relations"] = [(
+            f"""
+                UNWIND $rows AS row
+                MATCH (from:{from_label} {{name: row.from_name}})-[r:{rel_type} {{article: row.article_title}}]->
+                      (to:{to_label} {{name: row.to_name}})
+                RETURN count(r) AS found
+            """, [{"from_name": f, "to_name": t, "article_title": title} for f, t, title in rows])
+            for (from_label, rel_type, to_label), rows in plan["relations"].items()]
+
+        jobs = [(kind, query, batch) for kind, queries in checks.items()
+                for query, rows in queries for batch in self._batches(rows)]
+        found = Counter()
+        lock = threading.Lock()
+
+        def count_shard(shard_jobs):
+            shard_found = Counter()
+            with self.driver.session() as session:
+                for kind, query, batch in shard_jobs:
+                    shard_found[kind] += session.execute_read(
+                        lambda tx: tx.run(query, rows=batch).single()["found"])
+            with lock:
+                found.update(shard_found)
+
+        # One query per label/type group, so these add up; spread them like the writes
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(count_shard, jobs[i::workers]) for i in range(workers)]:
+                future.result()
+
+        report = {"retries": stats["retries"], "failed_batches": stats["failed_batches"]}
+        for kind, queries in checks.items():
+            report[kind] = {"expected": sum(len(rows) for _, rows in queries), "found": found[kind]}
+
+        ok = stats["failed_batches"] == 0 and all(
+            report[kind]["expected"] == report[kind]["found"] for kind in checks)
+        color = Fore.GREEN if ok else Fore.RED
+        print(color + "🔎 Consistency: " + ", ".join(
+            f"{kind} {report[kind]['found']}/{report[kind]['expected']}" for kind in checks)
+            + (f", {stats['failed_batches']} failed batches" if stats["failed_batches"] else ""))
+        # found > expected means duplicates (e.g. concurrent MERGE on a key without a constraint)
+        return report
+
+    def create_indexes(self):
+        with self.driver.session() as session:
+            try:
+                # MERGE (a:Article {title}) runs once per article and relationship, keep it a seek
+                session.run("CREATE CONSTRAINT article_title IF NOT EXISTS "
+                            "FOR (a:Article) REQUIRE a.title IS UNIQUE")
+            except Exception as e:
+                print(Fore.YELLOW + f"⚠️ Couldn't create article index: {e}")
+
+            # Labels are clamped to ENTITY_LABELS, so one name index per label covers every entity MERGE
+            for label in ENTITY_LABELS:
+                safe_label = sanitize_label(label)
+                try:
+                    session.run(f"CREATE INDEX `{safe_label.lower()}_name` IF NOT EXISTS "
+                                f"FOR (e:{safe_label}) ON (e.name)")
+                except Exception as e:
+                    print(Fore.YELLOW + f"⚠️ Couldn't create index for {safe_label}: {e}")
+
+    def compute_entity_importance(self):
+        """Post-ingest analytics: degree, weighted PageRank and per-bias mention counts on every node.
+
+        PageRank runs in GDS when the plugin is installed, otherwise as a power
+        iteration over a numpy edge list. Parallel edges between the same pair of
+        nodes (e.g. the same relation asserted by several articles) add up to the
+        edge weight. Importance is the PageRank score, used by app.get_article_graph.
+        """
+        print(Fore.CYAN + "📊 Computing entity importance...")
+
+        with self.driver.session() as session:
+            node_ids, source, target, weight = session.execute_read(self._read_edges)
+            mentions = session.execute_read(lambda tx: [
+                (record["id"], record["bias"], record["mentions"]) for record in tx.run("""
+                    MATCH (a:Article)-[:MENTIONS]->(e)
+                    RETURN elementId(e) AS id, a.bias AS bias, count(*) AS mentions
+                """)
+            ])
+
+        if not len(weight):
+            print(Fore.YELLOW + "⚠️ No relationships, skipping importance")
+            return
+
+        node_count = len(node_ids)
+        degree = (np.bincount(source, weights=weight, minlength=node_count)
+                  + np.bincount(target, weights=weight, minlength=node_count))
+
+        pagerank = self._gds_pagerank()
+        if pagerank is None:
+            pagerank = self._pagerank(source, target, weight, node_count)
+            pagerank = dict(zip(node_ids, pagerank.tolist()))
+
+        properties = {
+            node_id: {"degree": int(d), "pagerank": pagerank.get(node_id, 0.0), "importance": pagerank.get(node_id, 0.0),
+                      "mention_count": 0}
+            for node_id, d in zip(node_ids, degree.tolist())
+        }
+        for node_id, bias, count in mentions:
+            props = properties.setdefault(node_id, {"mention_count": 0})
+            bias_key = "mentions_" + re.sub(r"\W", "_", (bias or "unknown").lower())
+            props[bias_key] = props.get(bias_key, 0) + count
+            props["mention_count"] += count
+
+        rows = [{"id": node_id, "properties": props} for node_id, props in properties.items()]
+        stats = Counter()
+        with self.driver.session() as session:
+            for batch in self._batches(rows):
+                self._write_with_retry(session, """
+                    UNWIND $rows AS row
+                    MATCH (n) WHERE elementId(n) = row.id
+                    SET n += row.properties
+                """, batch, stats)
+
+        if stats["failed_batches"]:
+            print(Fore.RED + f"✖ Importance missing on some nodes, {stats['failed_batches']} batches failed")
+        print(f"{Fore.GREEN}✔ Importance written to {len(rows)} nodes")
+
+    @staticmethod
+    def _read_edges(tx):
+        """Weighted edge list with nodes numbered as they stream in, (element ids, source, target, weight).
+
+        Parallel edges are counted in Cypher and element ids are kept once per node,
+        so memory grows with distinct node pairs rather than with relationships.
+        """
+        index = {}
+        source, target, weight = array("q"), array("q"), array("q")
+        for record in tx.run("""
+            MATCH (s)-[r]->(t)
+            RETURN elementId(s) AS source, elementId(t) AS target, count(*) AS weight
+        """):
+            source.append(index.setdefault(record["source"], len(index)))
+            target.append(index.setdefault(record["target"], len(index)))
+            weight.append(record["weight"])
+        return (list(index), np.frombuffer(source, dtype=np.int64), np.frombuffer(target, dtype=np.int64),
+                np.frombuffer(weight, dtype=np.int64).astype(float))
+
+    def _pagerank(self, source, target, weight, node_count):
+        out_weight = np.bincount(source, weights=weight, minlength=node_count)
+        dangling = out_weight == 0
+        edge_share = weight / out_weight[source]
+
+        rank = np.full(node_count, 1.0 / node_count)
+        for _ in range(PAGERANK_MAX_ITERATIONS):
+            spread = np.bincount(target, weights=rank[source] * edge_share, minlength=node_count)
+            new_rank = (1 - PAGERANK_DAMPING) / node_count + PAGERANK_DAMPING * (spread + rank[dangling].sum() / node_count)
+            converged = np.abs(new_rank - rank).sum() < PAGERANK_TOLERANCE
+            rank = new_rank
+            if converged:
+                break
+        return rank
+
+    def _gds_pagerank(self):
+        """PageRank via the Graph Data Science plugin, or None when it is not installed or fails."""
+        try:
+            with self.driver.session() as session:
+                session.run("RETURN gds.version() AS version").consume()
+        except Exception as e:
+            print(Fore.CYAN + f"ℹ️ Graph Data Science not available, PageRank runs in numpy ({e})")
+            return None
+
+        try:
+            with self.driver.session() as session:
+                session.run(f"CALL gds.graph.drop('{GDS_GRAPH_NAME}', false)").consume()
+                session.run(f"""
+                    CALL gds.graph.project('{GDS_GRAPH_NAME}', '*', {{
+                        ALL: {{type: '*', properties: {{weight: {{property: '*', aggregation: 'COUNT'}}}}}}
+                    }})
+                """).consume()
+                result = session.run(f"""
+                    CALL gds.pageRank.stream('{GDS_GRAPH_NAME}', {{
+                        relationshipWeightProperty: 'weight',
+                        dampingFactor: {PAGERANK_DAMPING},
+                        maxIterations: {PAGERANK_MAX_ITERATIONS},
+                        tolerance: {PAGERANK_TOLERANCE}
+                    }})
+                    YIELD nodeId, score
+                    RETURN elementId(gds.util.asNode(nodeId)) AS id, score
+                """)
+                pagerank = {record["id"]: record["score"] for record in result}
+                session.run(f"CALL gds.graph.drop('{GDS_GRAPH_NAME}', false)").consume()
+                return pagerank
+        except Exception as e:
+            print(Fore.YELLOW + f"⚠️ GDS PageRank failed, falling back to numpy: {e}")
+            # Don't leave a half-built projection in the catalog for the next run
+            try:
+                with self.driver.session() as session:
+                    session.run(f"CALL gds.graph.drop('{GDS_GRAPH_NAME}', false)").consume()
+            except Exception as drop_error:
+                print(Fore.YELLOW + f"⚠️ Could not drop the GDS projection '{GDS_GRAPH_NAME}': {drop_error}")
+            return None
+
     # Removed fuzzy matching and label preference
     # def fuzzy_match_entity(self, entity_name): ...
     # def normalize_entity(self, entity_name): ...
@@ -170,12 +652,19 @@ class ArticleGraph:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load data/entities_and_relations.json into Neo4j")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help="parallel writer sessions (1 = one transaction per article, in order)")
+    args = parser.parse_args()
+
     try:
         with open("data/entities_and_relations.json", encoding="utf-8") as f:
             article_data = json.load(f)
 
         graph = ArticleGraph(URI, USER, PASSWORD)
-        graph.process_all_articles(article_data)
+        graph.create_indexes()
+        graph.process_all_articles(article_data, args.workers)
+        graph.compute_entity_importance()
         graph.close()
         print("\nProcessing complete!")
 
@@ -10,7 +10,8 @@ SCRIPTS_TO_RUN = [
     "news_scraper.py",
     "nlp.py",
     "populate_graph.py",
-    "app.py"
+    "export_snapshots.py",
+    "serve.py"
 ]
 
 init(autoreset=True)
@@ -0,0 +1,63 @@
+import os
+import sys
+import argparse
+import multiprocessing
+from dotenv import load_dotenv
+from colorama import Fore, init
+
+load_dotenv()
+init(autoreset=True)
+
+HOST = os.getenv("APP_HOST", "0.0.0.0")
+PORT = int(os.getenv("APP_PORT", 5000))
+WORKERS = int(os.getenv("APP_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 9)))
+THREADS = int(os.getenv("APP_THREADS", 8))  # request threads per worker, keep <= NEO4J_MAX_CONNECTION_POOL_SIZE
+
+
+def run_server(wsgi_app, host=HOST, port=PORT, workers=WORKERS, threads=THREADS, preload=False, access_log=True):
+    """Serve a WSGI app with multiple worker processes (gunicorn) or, on Windows, threads (waitress)."""
+    if sys.platform == "win32":
+        # gunicorn does not run on Windows; waitress is thread-based only
+        from waitress import serve
+        print(Fore.CYAN + f"🚀 waitress on http://{host}:{port} ({workers * threads} threads)")
+        serve(wsgi_app, host=host, port=port, threads=workers * threads)
+        return
+
+    from gunicorn.app.base import BaseApplication
+
+    class StandaloneApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    print(Fore.CYAN + f"🚀 gunicorn on http://{host}:{port} ({workers} workers x {threads} threads)")
+    StandaloneApplication(wsgi_app, {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        "preload_app": preload,
+        "timeout": 60,
+        "keepalive": 5,
+        "accesslog": "-" if access_log else None,
+    }).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run app.py under a production server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--threads", type=int, default=THREADS)
+    args = parser.parse_args()
+
+    from app import app
+    run_server(app, args.host, args.port, args.workers, args.threads)
@@ -2,13 +2,16 @@
 const COLLAPSED_CLASS = 'collapsed';
 const VISIBLE_CLASS = 'visible';
 const ACTIVE_CLASS = 'active';
+const SNAPSHOT_URL = '/static/snapshots/';
+const LAYOUT_SCALE = 1000; // export_snapshots.py stores coordinates as integers in [0, LAYOUT_SCALE]
 
 // ===== Global State =====
 let currentState = {
     openArticleId: null,
     articlesCache: {},
     graphCache: {},
-    graphInstance: null
+    graphInstance: null,
+    snapshotManifest: null
 };
 
 // ===== DOM Elements =====
@@ -114,12 +117,60 @@ async function fetchArticleById(articleId) {
 async function fetchGraphData(articleId) {
     if (currentState.graphCache[articleId]) return currentState.graphCache[articleId];
 
+    // Precomputed snapshot first, the API only for articles exported after the last snapshot run
+    const data = await fetchGraphSnapshot(articleId) || await fetchGraphFromApi(articleId);
+    currentState.graphCache[articleId] = data;
+    return data;
+}
+
+async function fetchGraphFromApi(articleId) {
     const response = await fetch(`/api/graph/${articleId}`);
     if (!response.ok) throw new Error('Graph data not available');
+    return response.json();
+}
 
-    const data = await response.json();
-    currentState.graphCache[articleId] = data;
-    return data;
+function loadSnapshotManifest() {
+    if (!currentState.snapshotManifest) {
+        currentState.snapshotManifest = fetch(`${SNAPSHOT_URL}manifest.json`, { cache: 'no-cache' })
+            .then(response => response.ok ? response.json() : { articles: {} })
+            .catch(() => ({ articles: {} }));
+    }
+    return currentState.snapshotManifest;
+}
+
+async function fetchGraphSnapshot(articleId) {
+    const manifest = await loadSnapshotManifest();
+    const file = manifest.articles[articleId];
+    if (!file) return null;
+
+    try {
+        const response = await fetch(SNAPSHOT_URL + file);
+        return response.ok ? decodeSnapshot(await response.json()) : null;
+    } catch (error) {
+        console.warn("Snapshot unavailable, falling back to API:", error);
+        return null;
+    }
+}
+
+// Expand the columnar snapshot format into the shape returned by /api/graph/<id>
+function decodeSnapshot(snapshot) {
+    const strings = snapshot.strings;
+    const { label, group, x, y, importance } = snapshot.nodes;
+    const nodes = label.map((labelId, i) => ({
+        id: i,
+        label: strings[labelId],
+        group: strings[group[i]],
+        x: x[i] / LAYOUT_SCALE,
+        y: y[i] / LAYOUT_SCALE,
+        importance: importance ? importance[i] : 0,
+        properties: {}
+    }));
+    const edges = snapshot.edges.source.map((source, i) => ({
+        from: source,
+        to: snapshot.edges.target[i],
+        label: strings[snapshot.edges.label[i]]
+    }));
+    return { nodes, edges, positioned: true };
 }
 
 function renderArticle(articleData) {
@@ -184,14 +235,17 @@ function renderGraph(graphData) {
             edges: []
         };
 
+        // Node size follows importance (PageRank computed in populate_graph.py)
+        const maxImportance = Math.max(...graphData.nodes.map(node => node.importance || 0)) || 1;
+
         // Process nodes
         graphData.nodes.forEach(node => {
             sigmaGraph.nodes.push({
                 id: node.id.toString(),
                 label: node.label || `Node ${node.id}`,
-                x: Math.random(), // Random initial position
-                y: Math.random(),
-                size: node.group === 'article' ? 8 : 5,
+                x: node.x ?? Math.random(), // Precomputed in snapshots, random initial position otherwise
+                y: node.y ?? Math.random(),
+                size: node.group === 'article' ? 8 : 3 + 7 * (node.importance || 0) / maxImportance,
                 color: getNodeColor(node.group || 'default'),
                 originalData: node.properties || {}
             });
@@ -282,21 +336,24 @@ function renderGraph(graphData) {
         // Create a simpler tooltip system using DOM
         createTooltipSystem(currentState.graphInstance);
 
-        // Apply ForceAtlas2 layout algorithm
-        currentState.graphInstance.startForceAtlas2({
-            barnesHutOptimize: false,
-            slowDown: 100,
-            gravity: 10,
-            scalingRatio: 4,
-            strongGravitMode: true
-        });
+        // Snapshots already carry a server-side layout
+        if (!graphData.positioned) {
+            // Apply ForceAtlas2 layout algorithm
+            currentState.graphInstance.startForceAtlas2({
+                barnesHutOptimize: false,
+                slowDown: 100,
+                gravity: 10,
+                scalingRatio: 4,
+                strongGravitMode: true
+            });
 
-        // Stop layout algorithm after a few seconds for better performance
-        setTimeout(() => {
-            if (currentState.graphInstance) {
-                currentState.graphInstance.stopForceAtlas2();
-            }
-        }, 100);
+            // Stop layout algorithm after a few seconds for better performance
+            setTimeout(() => {
+                if (currentState.graphInstance) {
+                    currentState.graphInstance.stopForceAtlas2();
+                }
+            }, 100);
+        }
 
     } catch (error) {
         console.error("Error rendering graph:", error);
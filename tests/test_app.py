@@ -0,0 +1,58 @@
+import app as app_module
+from fake_neo4j import GraphStore, FakeDriver, FakeAsyncDriver
+from populate_graph import ArticleGraph, URI, USER, PASSWORD
+
+
+def load(articles):
+    store = GraphStore()
+    graph = ArticleGraph(URI, USER, PASSWORD, driver=FakeDriver(store))
+    graph.process_all_articles(articles)
+    graph.compute_entity_importance()
+    return store
+
+
+def article(title, entities, relations):
+    return {
+        "article_source": "N1",
+        "article_bias": "neutral",
+        "article_title": title,
+        "article_url": f"https://example.invalid/{title}",
+        "article_text": "Tekst.",
+        "entities": entities,
+        "relations": relations,
+        "fact_check": "",
+        "tone_analysis": "neutralan"
+    }
+
+
+def get_graph(store, monkeypatch, title, **args):
+    monkeypatch.setattr(app_module, "create_driver", lambda: FakeAsyncDriver(store))
+    monkeypatch.setattr(app_module, "_driver", None)
+    article_id = store.node_index[("Article", "title", title)].element_id
+    response = app_module.app.test_client().get(f"/api/graph/{article_id}", query_string=args)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_graph_keeps_relation_endpoints_the_article_does_not_mention(monkeypatch):
+    store = load([article("Sastanak", "Vučić:Osoba, Vlada:Organizacija",
+                          "Vučić -[:sastao se sa]-> Ursula fon der Lajen")])
+
+    graph = get_graph(store, monkeypatch, "Sastanak")
+
+    assert sorted(node["label"] for node in graph["nodes"]) == ["Ursula fon der Lajen", "Vlada", "Vučić"]
+    labels = {node["id"]: node["label"] for node in graph["nodes"]}
+    assert [(labels[edge["from"]], labels[edge["to"]]) for edge in graph["edges"]
+            if edge["from"] != edge["to"]] == [("Vučić", "Ursula fon der Lajen")]
+
+
+def test_graph_limit_applies_to_relation_endpoints_too(monkeypatch):
+    # Ursula is in two articles, so she outranks the entities only this article has
+    store = load([
+        article("Sastanak", "Vučić:Osoba, Vlada:Organizacija", "Vučić -[:sastao se sa]-> Ursula fon der Lajen"),
+        article("Brisel", "Ursula fon der Lajen:Osoba, EU:Organizacija", "Ursula fon der Lajen -[:vodi]-> EU"),
+    ])
+
+    graph = get_graph(store, monkeypatch, "Sastanak", limit=2)
+
+    assert sorted(node["label"] for node in graph["nodes"]) == ["Ursula fon der Lajen", "Vučić"]
@@ -0,0 +1,29 @@
+import os
+
+# nlp creates its OpenAI client on import; these tests never call it
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import nlp
+from fake_neo4j import GraphStore, FakeDriver
+from populate_graph import ArticleGraph, URI, USER, PASSWORD
+
+
+def test_gazetteer_from_neo4j_keeps_multi_word_labels():
+    store = GraphStore()
+    driver = FakeDriver(store)
+    ArticleGraph(URI, USER, PASSWORD, driver=driver).process_all_articles([{
+        "article_source": "N1",
+        "article_bias": "neutral",
+        "article_title": "Izložba",
+        "article_url": "https://example.invalid/izlozba",
+        "article_text": "Tekst.",
+        "entities": "Seoba Srba:Umetničko delo, Paja Jovanović:Osoba",
+        "relations": "",
+        "fact_check": "",
+        "tone_analysis": "neutralan"
+    }])
+
+    extractor = nlp.GazetteerExtractor.from_neo4j(driver)
+    [(entities, _)] = extractor.extract([{"title": "", "text": "Seobu Srba je naslikao Paja Jovanović."}])
+
+    assert sorted(entities) == [("Paja Jovanović", "Osoba"), ("Seoba Srba", "Umetničko delo")]